@@ -0,0 +1,126 @@
+"""
+In-memory stand-in for the boto3 EC2 client with configurable latency.
+
+Only the calls the player flow needs are implemented. Every call sleeps for
+the configured latency and is counted per (phase, action). The phase is
+whatever the calling thread set on client.phase, or the thread's name for
+the plugin's background threads, so a benchmark can report how many AWS
+calls each player action costs.
+"""
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+from botocore.exceptions import ClientError
+
+
+def _not_found(operation, instance_ids):
+    return ClientError(
+        {
+            "Error": {
+                "Code": "InvalidInstanceID.NotFound",
+                "Message": f"The instance IDs '{', '.join(instance_ids)}' do not exist",
+            }
+        },
+        operation,
+    )
+
+
+class FakeEC2Client:
+    def __init__(self, latency=0.05, jitter=0.0, boot_time=20.0):
+        """
+        latency: seconds every call takes
+        jitter: extra random seconds added to each call, up to this much
+        boot_time: seconds from RunInstances until an instance is running with a public IP
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.boot_time = boot_time
+        self.calls = {}
+        self.instances = {}
+        self.phase = threading.local()
+        self._lock = threading.Lock()
+
+    def _call(self, action):
+        phase = getattr(self.phase, "name", None)
+        if phase is None:
+            # ec2-worker_3 -> ec2-worker
+            phase = re.sub(r"_\d+$", "", threading.current_thread().name)
+        key = (phase, action)
+        with self._lock:
+            self.calls[key] = self.calls.get(key, 0) + 1
+        time.sleep(self.latency + random.uniform(0, self.jitter))
+
+    def reset_counts(self):
+        with self._lock:
+            self.calls = {}
+
+    def _state(self, instance):
+        if instance["State"]["Name"] == "terminated":
+            return instance
+        if time.time() - instance["_launched"] >= self.boot_time:
+            instance["State"] = {"Name": "running"}
+            instance["PublicIpAddress"] = instance["_ip"]
+        return instance
+
+    def run_instances(self, MinCount=1, MaxCount=1, TagSpecifications=None, **params):
+        self._call("RunInstances")
+        tags = TagSpecifications[0]["Tags"] if TagSpecifications else []
+        launched = []
+        with self._lock:
+            for _ in range(MaxCount):
+                n = len(self.instances) + 1
+                instance = {
+                    "InstanceId": f"i-{n:017x}",
+                    "ImageId": params.get("ImageId"),
+                    "InstanceType": params.get("InstanceType"),
+                    "State": {"Name": "pending"},
+                    "LaunchTime": datetime.now(timezone.utc),
+                    "Tags": list(tags),
+                    "_launched": time.time(),
+                    "_ip": f"10.{n // 65536 % 256}.{n // 256 % 256}.{n % 256}",
+                }
+                self.instances[instance["InstanceId"]] = instance
+                launched.append(instance)
+        return {"Instances": [self._public(i) for i in launched]}
+
+    def describe_instances(self, InstanceIds=None, Filters=None, **params):
+        self._call("DescribeInstances")
+        if InstanceIds:
+            missing = [i for i in InstanceIds if i not in self.instances]
+            if missing:
+                raise _not_found("DescribeInstances", missing)
+            wanted = InstanceIds
+        else:
+            wanted = list(self.instances)
+            for f in Filters or []:
+                if f["Name"] == "instance-id":
+                    wanted = [i for i in f["Values"] if i in self.instances]
+        return {
+            "Reservations": [
+                {"Instances": [self._public(self._state(self.instances[i])) for i in wanted]}
+            ]
+        }
+
+    def terminate_instances(self, InstanceIds, **params):
+        self._call("TerminateInstances")
+        missing = [i for i in InstanceIds if i not in self.instances]
+        if missing:
+            raise _not_found("TerminateInstances", missing)
+        for instance_id in InstanceIds:
+            self.instances[instance_id]["State"] = {"Name": "terminated"}
+            self.instances[instance_id].pop("PublicIpAddress", None)
+        return {"TerminatingInstances": [{"InstanceId": i} for i in InstanceIds]}
+
+    def create_tags(self, Resources, Tags, **params):
+        self._call("CreateTags")
+        for resource in Resources:
+            if resource in self.instances:
+                self.instances[resource]["Tags"].extend(Tags)
+        return {}
+
+    @staticmethod
+    def _public(instance):
+        return {k: v for k, v in instance.items() if not k.startswith("_")}
@@ -0,0 +1,232 @@
+"""
+Drive concurrent simulated players through the EC2 challenge flow:
+
+    GET /api/v1/instance -> GET /api/v1/instance_status (until it has an IP)
+    -> POST /api/v1/challenges/attempt (wrong flag) -> attempt (right flag, solve)
+
+The plugin runs inside a CTFd test app with every AWS call answered by
+FakeEC2Client. Run it from the root of a CTFd checkout that has this plugin
+installed as CTFd/plugins/ec2_challenges:
+
+    python /path/to/benchmarks/player_flow.py --players 50 --latency 0.1
+"""
+import argparse
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.getcwd())
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_ec2 import FakeEC2Client  # noqa: E402
+
+
+FLAG = "flag{benchmark}"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=50, help="concurrent players (default: 50)")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per fake AWS call (default: 0.05)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random seconds per AWS call (default: 0)")
+    parser.add_argument("--boot-time", type=float, default=5.0, help="seconds until a fake instance has an IP (default: 5)")
+    parser.add_argument("--poll-interval", type=int, default=1, help="EC2_POLL_INTERVAL for the plugin (default: 1)")
+    parser.add_argument("--status-interval", type=float, default=1.0, help="seconds between a player's status polls (default: 1)")
+    parser.add_argument("--warm-pool", type=int, default=0, help="warm pool size for the challenge (default: 0)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="seconds a player waits for an IP (default: 300)")
+    parser.add_argument("--output", help="also append the report to this file, e.g. bench_output.txt")
+    return parser.parse_args()
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+
+class Recorder:
+    def __init__(self, fake):
+        self.fake = fake
+        self.timings = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            self.timings.setdefault(name, []).append(seconds)
+
+    def timed(self, name, func, *args, **kwargs):
+        # The test client handles the request in this thread, so AWS calls made
+        # while it runs belong to this endpoint
+        self.fake.phase.name = name
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.add(name, time.perf_counter() - started)
+            self.fake.phase.name = None
+
+
+def run_player(client, recorder, challenge_id, args):
+    started = time.perf_counter()
+    r = recorder.timed("GET /api/v1/instance", client.get, f"/api/v1/instance?id={challenge_id}")
+    data = r.get_json()
+    if not data["success"]:
+        raise RuntimeError(f"Launch failed: {data['data']}")
+    tracker_id = data["data"]["tracker_id"]
+
+    deadline = time.time() + args.timeout
+    while True:
+        r = recorder.timed("GET /api/v1/instance_status", client.get, f"/api/v1/instance_status?id={tracker_id}")
+        status = r.get_json()
+        if status["data"] and status["data"].get("state") == "failed":
+            raise RuntimeError(f"Instance failed: {status.get('error')}")
+        if status["data"] and status["data"].get("running") and status.get("public_ip"):
+            break
+        if time.time() > deadline:
+            raise TimeoutError(f"No IP for tracker {tracker_id} after {args.timeout}s")
+        time.sleep(args.status_interval)
+    recorder.add("time to IP", time.perf_counter() - started)
+
+    for submission in ("wrong", FLAG):
+        r = recorder.timed(
+            "POST /api/v1/challenges/attempt",
+            client.post,
+            "/api/v1/challenges/attempt",
+            json={"challenge_id": challenge_id, "submission": submission},
+        )
+        result = r.get_json()["data"]["status"]
+        if result != ("correct" if submission == FLAG else "incorrect"):
+            raise RuntimeError(f"Unexpected attempt result {result}")
+
+
+def wait_for_pool(app, challenge_id, size, timeout):
+    from CTFd.plugins.ec2_challenges.models import EC2ChallengeTracker
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with app.app_context():
+            ready = EC2ChallengeTracker.query.filter_by(
+                challenge_id=challenge_id, owner_id=None, status="ready"
+            ).count()
+        if ready >= size:
+            return
+        time.sleep(1)
+    raise TimeoutError(f"Warm pool did not fill within {timeout}s")
+
+
+def report(args, recorder, fake, elapsed, completed, failures):
+    requests = sum(len(v) for k, v in recorder.timings.items() if k.startswith(("GET", "POST")))
+    lines = [
+        f"EC2 player flow: {args.players} players, {args.latency * 1000:.0f}ms AWS latency, "
+        f"{args.boot_time:.0f}s boot, warm pool {args.warm_pool}",
+        f"completed {completed}, failed {len(failures)}, wall time {elapsed:.2f}s",
+        f"throughput {completed / elapsed:.2f} flows/s, {requests / elapsed:.1f} requests/s",
+        "",
+        f"{'endpoint':<34}{'count':>7}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}",
+    ]
+    for name, values in sorted(recorder.timings.items()):
+        lines.append(
+            f"{name:<34}{len(values):>7}{percentile(values, 50) * 1000:>10.1f}"
+            f"{percentile(values, 99) * 1000:>10.1f}{max(values) * 1000:>10.1f}"
+        )
+    lines += ["", f"{'AWS calls by caller':<34}{'action':<22}{'total':>7}{'per player':>12}"]
+    for (phase, action), count in sorted(fake.calls.items()):
+        lines.append(f"{phase:<34}{action:<22}{count:>7}{count / max(args.players, 1):>12.2f}")
+    lines += [
+        "",
+        "AWS calls are counted by the fake client, which bypasses botocore: the client-side rate",
+        "limiter and the AWS call metrics are not exercised and none of these figures include them.",
+    ]
+    for failure in failures[:10]:
+        lines.append(f"failure: {failure}")
+
+    text = "\n".join(lines) + "\n"
+    print(text)
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(text + "\n")
+
+
+def main():
+    args = parse_args()
+
+    db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    db_file.close()
+    os.environ.setdefault("TESTING_DATABASE_URL", f"sqlite:///{db_file.name}")
+    os.environ["EC2_POLL_INTERVAL"] = str(args.poll_interval)
+    os.environ["EC2_WARM_POOL_INTERVAL"] = str(max(args.poll_interval, 1))
+    os.environ["AWS_REGION"] = "us-east-1"
+
+    # Swap the shared client out before the plugin's background tasks start. The
+    # plugin imports get_client by name, so patch its copy too or SSM calls reach AWS
+    import CTFd.plugins.ec2_challenges as ec2_plugin
+    from CTFd.plugins.ec2_challenges import aws as ec2_aws
+
+    fake = FakeEC2Client(latency=args.latency, jitter=args.jitter, boot_time=args.boot_time)
+    ec2_aws.get_client = lambda ec2_config, service_name="ec2": fake
+    ec2_plugin.get_client = ec2_aws.get_client
+
+    from tests.helpers import create_ctfd, destroy_ctfd, gen_flag, login_as_user, register_user
+    from CTFd.models import db
+    from CTFd.plugins.ec2_challenges.models import EC2Challenge
+
+    app = create_ctfd(enable_plugins=True)
+    try:
+        with app.app_context():
+            challenge = EC2Challenge(
+                name="Benchmark",
+                category="benchmark",
+                description="Benchmark challenge",
+                value=100,
+                state="visible",
+                type="ec2",
+                ami_id="ami-benchmark",
+                instance_type="t3.micro",
+                security_group="sg-benchmark",
+                subnet_id="subnet-benchmark",
+                auto_stop_time=1800,
+                warm_pool_size=args.warm_pool,
+            )
+            db.session.add(challenge)
+            db.session.commit()
+            challenge_id = challenge.id
+            gen_flag(db, challenge_id=challenge_id, content=FLAG)
+
+        clients = []
+        for i in range(args.players):
+            name = f"bench{i}"
+            register_user(app, name=name, email=f"{name}@examplectf.com", password="password")
+            clients.append(login_as_user(app, name=name, password="password"))
+
+        if args.warm_pool:
+            wait_for_pool(app, challenge_id, args.warm_pool, args.timeout)
+        fake.reset_counts()
+
+        recorder = Recorder(fake)
+        failures = []
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.players) as executor:
+            futures = [
+                executor.submit(run_player, client, recorder, challenge_id, args)
+                for client in clients
+            ]
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    failures.append(str(e))
+        elapsed = time.perf_counter() - started
+
+        report(args, recorder, fake, elapsed, args.players - len(failures), failures)
+    finally:
+        destroy_ctfd(app)
+        os.unlink(db_file.name)
+
+
+if __name__ == "__main__":
+    main()
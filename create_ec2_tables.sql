@@ -25,10 +25,16 @@ CREATE TABLE IF NOT EXISTS `ec2_challenge_tracker` (
     `revert_time` int DEFAULT NULL,
     `host` varchar(128) DEFAULT NULL,
     `flag` varchar(128) DEFAULT NULL,
+    `status` varchar(32) DEFAULT NULL,
+    `error` varchar(255) DEFAULT NULL,
+    `batch_id` varchar(64) DEFAULT NULL,
+    `reset_task_id` varchar(128) DEFAULT NULL,
     PRIMARY KEY (`id`),
+    KEY `ix_ec2_challenge_tracker_batch_id` (`batch_id`),
     KEY `ix_ec2_challenge_tracker_challenge_id` (`challenge_id`),
     KEY `ix_ec2_challenge_tracker_instance_id` (`instance_id`),
     KEY `ix_ec2_challenge_tracker_owner_id` (`owner_id`),
+    KEY `ix_ec2_challenge_tracker_owner_challenge` (`owner_id`, `challenge_id`),
     KEY `ix_ec2_challenge_tracker_revert_time` (`revert_time`),
     KEY `ix_ec2_challenge_tracker_timestamp` (`timestamp`)
 );
@@ -44,6 +50,9 @@ CREATE TABLE IF NOT EXISTS `ec2_challenge` (
     `setup_script` text,
     `guide` text,
     `auto_stop_time` int DEFAULT 1800,
+    `warm_pool_size` int DEFAULT 0,
+    `reset_strategy` varchar(16) DEFAULT 'relaunch',
+    `reset_script` text,
     PRIMARY KEY (`id`),
     KEY `ix_ec2_challenge_ami_id` (`ami_id`),
     CONSTRAINT `ec2_challenge_ibfk_1` FOREIGN KEY (`id`) REFERENCES `challenges` (`id`)
@@ -58,8 +67,31 @@ CREATE TABLE IF NOT EXISTS `ec2_history` (
     `start_time` int DEFAULT NULL,
     `end_time` int DEFAULT NULL,
     `solved` tinyint(1) DEFAULT 0,
+    `tracker_id` int DEFAULT NULL,
     PRIMARY KEY (`id`),
-    KEY `ix_ec2_history_id` (`id`)
+    KEY `ix_ec2_history_id` (`id`),
+    KEY `ix_ec2_history_challenge_id` (`challenge_id`),
+    KEY `ix_ec2_history_start_time` (`start_time`),
+    KEY `ix_ec2_history_tracker_id` (`tracker_id`),
+    KEY `ix_ec2_history_user_id` (`user_id`)
+);
+
+-- Create EC2Job table
+CREATE TABLE IF NOT EXISTS `ec2_job` (
+    `id` int NOT NULL AUTO_INCREMENT,
+    `kind` varchar(64) DEFAULT NULL,
+    `payload` text,
+    `status` varchar(16) DEFAULT NULL,
+    `attempts` int DEFAULT NULL,
+    `max_attempts` int DEFAULT NULL,
+    `run_at` int DEFAULT NULL,
+    `created` int DEFAULT NULL,
+    `locked_by` varchar(64) DEFAULT NULL,
+    `locked_at` int DEFAULT NULL,
+    `last_error` varchar(255) DEFAULT NULL,
+    PRIMARY KEY (`id`),
+    KEY `ix_ec2_job_kind` (`kind`),
+    KEY `ix_ec2_job_status_run_at` (`status`, `run_at`)
 );
 
 -- Insert default EC2 config if it doesn't exist
@@ -1,12 +1,16 @@
-import boto3
 import os
 import json
 import hashlib
+import hmac
 import random
 import string
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from flask_restx import Namespace, Resource
-from flask import request, render_template, Blueprint, abort
+from botocore.exceptions import ClientError
+from flask import request, render_template, Blueprint, abort, Response, stream_with_context
 
 from CTFd.plugins.challenges import BaseChallenge
 from CTFd.utils.user import get_current_user, get_current_team, is_admin, get_ip
@@ -16,6 +20,7 @@ from CTFd.utils.decorators import authed_only, admins_only
 from CTFd.utils.decorators.visibility import check_challenge_visibility
 from CTFd.plugins import register_plugin_assets_directory
 from CTFd.api import CTFd_API_v1
+from CTFd.cache import cache
 from CTFd.models import (
     db,
     Challenges,
@@ -28,8 +33,117 @@ from CTFd.models import (
     Users,
 )
 
-from .models import EC2Config, EC2ChallengeTracker, EC2Challenge, EC2History
+from . import metrics, tracing
+from .aws import THROTTLE_ERROR_CODES, get_client, get_ec2_client, governor, is_retryable, reset_clients
+from .cache import (
+    clear_challenge_flags,
+    clear_challenge_params,
+    clear_ec2_config,
+    get_challenge_params,
+    get_ec2_config,
+    is_challenge_flag,
+)
+from .models import EC2Config, EC2ChallengeTracker, EC2Challenge, EC2History, EC2Job
 from .forms import EC2ConfigForm
+from .history import HISTORY_FLUSH_INTERVAL, flush_at_exit, flush_history, record_end, record_start
+from .jobs import (
+    JOB_POLL_INTERVAL,
+    JOB_RECOVERY_INTERVAL,
+    dispatch_jobs,
+    enqueue,
+    job,
+    queue_stats,
+    recover_stale_jobs,
+    retry_dead_jobs,
+)
+from .workers import async_workers, start_periodic, wake
+
+
+# Seconds subnet/security group/AMI listings are cached for
+RESOURCE_CACHE_TIMEOUT = int(os.environ.get("EC2_RESOURCE_CACHE_TIMEOUT", 300))
+
+# Seconds between warm pool replenishment passes
+WARM_POOL_INTERVAL = int(os.environ.get("EC2_WARM_POOL_INTERVAL", 30))
+
+# Seconds between background describe_instances passes
+POLL_INTERVAL = int(os.environ.get("EC2_POLL_INTERVAL", 5))
+
+# Minimum seconds between early poller runs asked for by status requests
+POLL_WAKE_INTERVAL = 2
+
+# DescribeInstances accepts at most 1000 instance IDs per call
+DESCRIBE_BATCH_SIZE = 1000
+
+# TerminateInstances accepts at most 1000 instance IDs per call
+TERMINATE_BATCH_SIZE = 1000
+
+# Instance IDs per StartInstances call when resuming reset instances
+START_BATCH_SIZE = 1000
+
+# Challenge reset strategies. Anything but relaunch keeps the instance.
+RESET_STRATEGIES = ("relaunch", "stop", "hibernate", "replace_root", "ssm")
+
+# Strategies that reset a running instance through an AWS task tracked by ID
+TASK_RESET_STRATEGIES = ("replace_root", "ssm")
+
+# Root volume replacement task states that end a reset
+REPLACE_ROOT_FAILED_STATES = ("failed", "failed-detached")
+
+# Instances per SSM SendCommand call, the API's limit
+SSM_BATCH_SIZE = 50
+# Seconds a reset script may run on an instance before SSM stops it
+SSM_RESET_TIMEOUT = 600
+# SSM command invocation statuses that end a reset
+SSM_FAILED_STATUSES = ("Cancelled", "Cancelling", "TimedOut", "Failed")
+
+# Most instances requested by one bulk provisioning call
+BULK_PROVISION_LIMIT = 1000
+
+# Seconds between expired instance sweeps
+REAPER_INTERVAL = int(os.environ.get("EC2_REAPER_INTERVAL", 30))
+
+# Most expired trackers handled per sweep, the rest wait for the next one
+REAPER_BATCH_LIMIT = 5000
+
+# Seconds after a solve before the reaper retries a termination the background job didn't finish
+SOLVE_TERMINATE_RETRY_DELAY = 60
+
+# Seconds a newly launched instance may be missing from DescribeInstances
+LAUNCH_GRACE_PERIOD = 300
+
+# Seconds an instance status stream stays open before the browser reconnects
+STREAM_TIMEOUT = int(os.environ.get("EC2_STREAM_TIMEOUT", 120))
+
+# Milliseconds the browser waits before reconnecting a status stream
+STREAM_RETRY_MS = 3000
+
+# Instance tag that carries a player's flag, read by the instance from its metadata
+FLAG_TAG = "ctfd-flag"
+
+# Runs on every instance from its user-data and keeps /etc/ctf-flag in sync with
+# the flag tag, so a flag assigned after launch (e.g. to a warm pool instance)
+# still reaches the VM
+FLAG_WATCH_SCRIPT = f"""
+# Per-player flag, delivered after launch through the {FLAG_TAG} instance tag
+cat > /usr/local/bin/ctf-flag-watch <<'WATCH'
+#!/bin/bash
+# Only root can read the flag file
+umask 077
+while true; do
+    TOKEN=$(curl -s -X PUT http://169.254.169.254/latest/api/token -H "X-aws-ec2-metadata-token-ttl-seconds: 300")
+    FLAG=$(curl -sf -H "X-aws-ec2-metadata-token: $TOKEN" http://169.254.169.254/latest/meta-data/tags/instance/{FLAG_TAG})
+    if [ -n "$FLAG" ] && [ "$FLAG" != "$(cat /etc/ctf-flag 2>/dev/null)" ]; then
+        echo "$FLAG" > /etc/ctf-flag.tmp && chmod 600 /etc/ctf-flag.tmp && mv /etc/ctf-flag.tmp /etc/ctf-flag
+    fi
+    sleep 5
+done
+WATCH
+chmod +x /usr/local/bin/ctf-flag-watch
+nohup /usr/local/bin/ctf-flag-watch >/dev/null 2>&1 &
+"""
+
+# Bearer token that lets a Prometheus server scrape /api/v1/ec2_metrics without an admin session
+METRICS_TOKEN = os.environ.get("EC2_METRICS_TOKEN", "")
 
 
 def define_ec2_admin(app):
@@ -85,6 +199,11 @@ def define_ec2_admin(app):
                 db.session.add(ec2)
                 db.session.commit()
                 ec2 = EC2Config.query.filter_by(id=1).first()
+
+                # Rebuild AWS clients with the new region/credentials
+                reset_clients()
+                clear_ec2_config()
+                cache.delete(resource_listings_key(ec2))
                 
                 print("DEBUG: Configuration saved successfully")
                 
@@ -117,16 +236,76 @@ def define_ec2_status(app):
         static_folder="assets",
     )
 
+    # Columns the instance table can be sorted by
+    sort_columns = {
+        "timestamp": EC2ChallengeTracker.timestamp,
+        "revert_time": EC2ChallengeTracker.revert_time,
+        "owner": Users.name,
+        "challenge": Challenges.name,
+        "status": EC2ChallengeTracker.status,
+    }
+
     @admin_ec2_status.route("/admin/ec2_status", methods=["GET", "POST"])
     @admins_only
     def ec2_admin():
-        ec2_tasks = EC2ChallengeTracker.query.all()
-        id_name_map = {}
-        for i in ec2_tasks:
-            name = Users.query.filter_by(id=i.owner_id).first()
-            id_name_map[i.owner_id] = name.name if name else "[User Removed]"
+        page = max(request.args.get("page", 1, type=int), 1)
+        per_page = min(max(request.args.get("per_page", 50, type=int), 1), 200)
+        sort = request.args.get("sort", "timestamp")
+        if sort not in sort_columns:
+            sort = "timestamp"
+        order = "asc" if request.args.get("order") == "asc" else "desc"
+        challenge_id = request.args.get("challenge_id", type=int)
+        owner = request.args.get("owner", "").strip()
+        status = request.args.get("status", "").strip()
+
+        # One query brings in owner and challenge names for the whole page
+        query = (
+            db.session.query(
+                EC2ChallengeTracker,
+                Users.name.label("owner_name"),
+                Challenges.name.label("challenge_name"),
+            )
+            .outerjoin(Users, Users.id == db.cast(EC2ChallengeTracker.owner_id, db.Integer))
+            .outerjoin(Challenges, Challenges.id == EC2ChallengeTracker.challenge_id)
+        )
+
+        if challenge_id:
+            query = query.filter(EC2ChallengeTracker.challenge_id == challenge_id)
+        if owner.isdigit():
+            query = query.filter(EC2ChallengeTracker.owner_id == owner)
+        elif owner:
+            query = query.filter(Users.name.ilike(f"%{owner}%"))
+        if status == "pool":
+            query = query.filter(EC2ChallengeTracker.owner_id.is_(None))
+        elif status:
+            query = query.filter(EC2ChallengeTracker.status == status)
+
+        column = sort_columns[sort]
+        query = query.order_by(
+            column.asc() if order == "asc" else column.desc(),
+            EC2ChallengeTracker.id.desc(),
+        )
+
+        tasks = query.paginate(page=page, per_page=per_page, error_out=False)
+
+        challenges = (
+            db.session.query(EC2Challenge.id, EC2Challenge.name, EC2Challenge.reset_strategy)
+            .order_by(EC2Challenge.name)
+            .all()
+        )
+        filters = {
+            "challenge_id": challenge_id or "",
+            "owner": owner,
+            "status": status,
+            "per_page": per_page,
+        }
         return render_template(
-            "admin_ec2_status.html", tasks=ec2_tasks, id_name_map=id_name_map
+            "admin_ec2_status.html",
+            tasks=tasks,
+            challenges=challenges,
+            filters=filters,
+            sort=sort,
+            order=order,
         )
 
     app.register_blueprint(admin_ec2_status)
@@ -155,9 +334,25 @@ def load(app):
     CTFd_API_v1.add_namespace(ec2_config_namespace, "/ec2_config")
     CTFd_API_v1.add_namespace(nuke_namespace, "/ec2_nuke")
     CTFd_API_v1.add_namespace(stop_instance_namespace, "/ec2_stop_instance")
+    CTFd_API_v1.add_namespace(metrics_namespace, "/ec2_metrics")
+    CTFd_API_v1.add_namespace(history_namespace, "/ec2_history")
+    CTFd_API_v1.add_namespace(jobs_namespace, "/ec2_jobs")
+
+    # Opt-in timing of SQL statements that run inside a trace
+    tracing.install()
+
+    # Background tasks. Every process runs queued AWS jobs on its own executor
+    start_periodic(app, "jobs", JOB_POLL_INTERVAL, dispatch_jobs)
+    start_periodic(app, "job_recovery", JOB_RECOVERY_INTERVAL, recover_stale_jobs, exclusive=True)
+    start_periodic(app, "warm_pool", WARM_POOL_INTERVAL, replenish_warm_pools, exclusive=True)
+    start_periodic(app, "instance_poller", POLL_INTERVAL, poll_instance_states, exclusive=True)
+    start_periodic(app, "reaper", REAPER_INTERVAL, reap_expired_instances, exclusive=True)
+    # Every process flushes its own history buffer
+    start_periodic(app, "history", HISTORY_FLUSH_INTERVAL, flush_history)
+    flush_at_exit(app)
     
     print("DEBUG: EC2 plugin loaded successfully")
-    print("DEBUG: Registered namespaces: /instance, /instance_status, /ec2, /ec2_config, /ec2_nuke, /ec2_stop_instance")
+    print("DEBUG: Registered namespaces: /instance, /instance_status, /ec2, /ec2_config, /ec2_nuke, /ec2_stop_instance, /ec2_metrics, /ec2_history, /ec2_jobs")
     
     # Initialize EC2 configuration from environment variables
     try:
@@ -193,6 +388,8 @@ def load(app):
         
         db.session.add(ec2)
         db.session.commit()
+        reset_clients()
+        clear_ec2_config()
     except Exception as e:
         # This can fail due to database migrations not yet applied, so we should fail out gracefully
         print(f"Warning: Could not initialize EC2 configuration from environment variables: {e}")
@@ -207,42 +404,98 @@ def upgrade(plugin_name):
     upgrade(plugin_name=plugin_name)
 
 
-def get_available_amis(ec2_config):
+def _tag_value(resource, key):
+    for tag in resource.get('Tags', []):
+        if tag['Key'] == key:
+            return tag['Value']
+    return None
+
+
+def iter_available_amis(ec2_config, architecture=None, name_prefix=None):
     """
-    Get list of available AMIs that can be used for challenges
+    Yield the AMIs that can be used for challenges, one page of results at a time
     """
-    if not ec2_config:
-        return []
-    
-    try:
-        ec2_client = boto3.client(
-            "ec2",
-            region_name=ec2_config.region,
-            aws_access_key_id=ec2_config.aws_access_key_id,
-            aws_secret_access_key=ec2_config.aws_secret_access_key,
-            aws_session_token=os.environ.get("AWS_SESSION_TOKEN"),
-        )
-        
-        # Get AMIs that are available for challenges
-        response = ec2_client.describe_images(
-            Owners=['self'],  # Only AMIs owned by the account
-            Filters=[
-                {'Name': 'tag:ctfd-challenge', 'Values': ['true']},
-                {'Name': 'state', 'Values': ['available']}
-            ]
-        )
-        
-        amis = []
-        for image in response['Images']:
-            amis.append({
+    ec2_client = get_ec2_client(ec2_config)
+
+    filters = [
+        {'Name': 'tag:ctfd-challenge', 'Values': ['true']},
+        {'Name': 'state', 'Values': ['available']}
+    ]
+    if architecture:
+        filters.append({'Name': 'architecture', 'Values': [architecture]})
+    if name_prefix:
+        filters.append({'Name': 'name', 'Values': [f'{name_prefix}*']})
+
+    paginator = ec2_client.get_paginator('describe_images')
+    # Only AMIs owned by the account
+    for page in paginator.paginate(Owners=['self'], Filters=filters):
+        for image in page['Images']:
+            yield {
                 'id': image['ImageId'],
                 'name': image.get('Name', image['ImageId']),
                 'description': image.get('Description', ''),
                 'architecture': image.get('Architecture', 'x86_64'),
                 'creation_date': image.get('CreationDate', '')
-            })
-        
-        return amis
+            }
+
+
+def iter_available_subnets(ec2_config, vpc_id=None, name_prefix=None):
+    """
+    Yield the available subnets, one page of results at a time
+    """
+    ec2_client = get_ec2_client(ec2_config)
+
+    filters = [{'Name': 'state', 'Values': ['available']}]
+    if vpc_id:
+        filters.append({'Name': 'vpc-id', 'Values': [vpc_id]})
+    if name_prefix:
+        filters.append({'Name': 'tag:Name', 'Values': [f'{name_prefix}*']})
+
+    paginator = ec2_client.get_paginator('describe_subnets')
+    for page in paginator.paginate(Filters=filters):
+        for subnet in page['Subnets']:
+            yield {
+                'id': subnet['SubnetId'],
+                'name': _tag_value(subnet, 'Name') or subnet['SubnetId'],
+                'vpc_id': subnet['VpcId'],
+                'availability_zone': subnet['AvailabilityZone'],
+                'cidr_block': subnet['CidrBlock']
+            }
+
+
+def iter_available_security_groups(ec2_config, vpc_id=None, name_prefix=None):
+    """
+    Yield the available security groups, one page of results at a time
+    """
+    ec2_client = get_ec2_client(ec2_config)
+
+    filters = []
+    if vpc_id:
+        filters.append({'Name': 'vpc-id', 'Values': [vpc_id]})
+    if name_prefix:
+        filters.append({'Name': 'group-name', 'Values': [f'{name_prefix}*']})
+
+    paginator = ec2_client.get_paginator('describe_security_groups')
+    for page in paginator.paginate(Filters=filters):
+        for sg in page['SecurityGroups']:
+            yield {
+                'id': sg['GroupId'],
+                'name': sg['GroupName'],
+                'description': sg.get('Description', ''),
+                'vpc_id': sg.get('VpcId', '')
+            }
+
+
+@tracing.traced
+def get_available_amis(ec2_config, **filters):
+    """
+    Get list of available AMIs that can be used for challenges
+    """
+    if not ec2_config:
+        return []
+    
+    try:
+        return list(iter_available_amis(ec2_config, **filters))
     except Exception as e:
         error_msg = str(e)
         print(f"ERROR: Failed to get available AMIs: {error_msg}")
@@ -254,7 +507,8 @@ def get_available_amis(ec2_config):
             return [{"error": "api_error", "message": error_msg}]
 
 
-def get_available_subnets(ec2_config):
+@tracing.traced
+def get_available_subnets(ec2_config, **filters):
     """
     Get available subnets in the VPC
     """
@@ -262,59 +516,21 @@ def get_available_subnets(ec2_config):
         return []
     
     try:
-        ec2_client = boto3.client(
-            "ec2",
-            region_name=ec2_config.region,
-            aws_access_key_id=ec2_config.aws_access_key_id,
-            aws_secret_access_key=ec2_config.aws_secret_access_key,
-            aws_session_token=os.environ.get("AWS_SESSION_TOKEN"),
-        )
-        
-        response = ec2_client.describe_subnets(
-            Filters=[{'Name': 'state', 'Values': ['available']}]
-        )
-        
-        subnets = []
-        for subnet in response['Subnets']:
-            subnets.append({
-                'id': subnet['SubnetId'],
-                'vpc_id': subnet['VpcId'],
-                'availability_zone': subnet['AvailabilityZone'],
-                'cidr_block': subnet['CidrBlock']
-            })
-        
-        return subnets
+        return list(iter_available_subnets(ec2_config, **filters))
     except Exception as e:
         print(f"ERROR: Failed to get available subnets: {str(e)}")
         return []
 
 
+@tracing.traced
 def get_security_groups(ec2_config, vpc_id):
     """
     Get security groups for a VPC
     """
-    if not ec2_config:
-        return []
-    
-    try:
-        ec2_client = boto3.client(
-            "ec2",
-            region_name=ec2_config.region,
-            aws_access_key_id=ec2_config.aws_access_key_id,
-            aws_secret_access_key=ec2_config.aws_secret_access_key,
-            aws_session_token=os.environ.get("AWS_SESSION_TOKEN"),
-        )
-        
-        response = ec2_client.describe_security_groups(
-            Filters=[{'Name': 'vpc-id', 'Values': [vpc_id]}]
-        )
-        
-        return [sg['GroupId'] for sg in response['SecurityGroups']]
-    except Exception as e:
-        print(f"ERROR: Failed to get security groups: {str(e)}")
-        return []
+    return [sg['id'] for sg in get_available_security_groups(ec2_config, vpc_id=vpc_id)]
 
 
+@tracing.traced
 def get_instance_public_ip(ec2_config, instance_id):
     """
     Get the public IP address of an EC2 instance
@@ -323,13 +539,7 @@ def get_instance_public_ip(ec2_config, instance_id):
         return None
         
     try:
-        ec2_client = boto3.client(
-            "ec2",
-            region_name=ec2_config.region,
-            aws_access_key_id=ec2_config.aws_access_key_id,
-            aws_secret_access_key=ec2_config.aws_secret_access_key,
-            aws_session_token=os.environ.get("AWS_SESSION_TOKEN"),
-        )
+        ec2_client = get_ec2_client(ec2_config)
         
         response = ec2_client.describe_instances(InstanceIds=[instance_id])
         
@@ -343,7 +553,8 @@ def get_instance_public_ip(ec2_config, instance_id):
         return None
 
 
-def get_available_security_groups(ec2_config):
+@tracing.traced
+def get_available_security_groups(ec2_config, **filters):
     """
     Get available security groups
     """
@@ -351,52 +562,68 @@ def get_available_security_groups(ec2_config):
         return []
     
     try:
-        ec2_client = boto3.client(
-            "ec2",
-            region_name=ec2_config.region,
-            aws_access_key_id=ec2_config.aws_access_key_id,
-            aws_secret_access_key=ec2_config.aws_secret_access_key,
-            aws_session_token=os.environ.get("AWS_SESSION_TOKEN"),
-        )
-        
-        response = ec2_client.describe_security_groups()
-        
-        security_groups = []
-        for sg in response['SecurityGroups']:
-            security_groups.append({
-                'id': sg['GroupId'],
-                'name': sg['GroupName'],
-                'description': sg.get('Description', ''),
-                'vpc_id': sg['VpcId']
-            })
-        
-        return security_groups
+        return list(iter_available_security_groups(ec2_config, **filters))
     except Exception as e:
         print(f"ERROR: Failed to get available security groups: {str(e)}")
         return []
 
 
-def launch_instance_from_ami(ec2_config, ami_id, instance_type, security_group, key_name, subnet_id, user_script=None):
+def resource_listings_key(ec2_config):
+    return f"ec2_resource_listings_{ec2_config.region}"
+
+
+def get_resource_listings(ec2_config, refresh=False):
+    """
+    Get the subnets, security groups and AMIs available to challenges.
+    The three lookups run concurrently and the result is kept in CTFd's cache
+    for RESOURCE_CACHE_TIMEOUT seconds unless a refresh is requested.
+    """
+    key = resource_listings_key(ec2_config)
+    if not refresh:
+        listings = cache.get(key)
+        if listings is not None:
+            return listings
+
+    # Build the client here, the lookup threads have no application context to read credentials in
+    get_ec2_client(ec2_config)
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        subnets = pool.submit(get_available_subnets, ec2_config)
+        security_groups = pool.submit(get_available_security_groups, ec2_config)
+        amis = pool.submit(get_available_amis, ec2_config)
+
+        listings = {
+            "subnets": subnets.result(),
+            "security_groups": security_groups.result(),
+            "amis": amis.result(),
+            "fetched_at": unix_time(datetime.utcnow()),
+        }
+
+    # Don't hold on to a failed lookup for long, but still shield AWS from retries
+    failed = any(ami.get("error") for ami in listings["amis"])
+    cache.set(key, listings, timeout=30 if failed else RESOURCE_CACHE_TIMEOUT)
+    return listings
+
+
+@tracing.traced
+def launch_instance_from_ami(ec2_config, ami_id, instance_type, security_group, key_name, subnet_id, user_script=None, extra_tags=None, count=1, hibernation=False, client_token=None, raise_retryable=False, name=None):
     """
-    Launch a new EC2 instance from an AMI
+    Launch new EC2 instances from an AMI without waiting for them to be running.
+    With count above one AWS may launch fewer instances than asked for.
+    Repeating a launch with the same client_token and parameters returns the instances
+    of the first one, so a retried launch has to pass the same name.
+    With raise_retryable, errors worth retrying later are raised instead of returned.
     """
     if not ec2_config:
         return False, ["EC2 configuration not found!"]
     
     try:
-        ec2_client = boto3.client(
-            "ec2",
-            region_name=ec2_config.region,
-            aws_access_key_id=ec2_config.aws_access_key_id,
-            aws_secret_access_key=ec2_config.aws_secret_access_key,
-            aws_session_token=os.environ.get("AWS_SESSION_TOKEN"),
-        )
+        ec2_client = get_ec2_client(ec2_config)
         
         # Prepare launch parameters
         launch_params = {
             'ImageId': ami_id,
             'MinCount': 1,
-            'MaxCount': 1,
+            'MaxCount': count,
             'InstanceType': instance_type,
             'SecurityGroupIds': [security_group],
             'SubnetId': subnet_id,
@@ -406,12 +633,16 @@ def launch_instance_from_ami(ec2_config, ami_id, instance_type, security_group,
                     'Tags': [
                         {'Key': 'ctfd-challenge', 'Value': 'true'},
                         {'Key': 'ctfd-managed', 'Value': 'true'},
-                        {'Key': 'Name', 'Value': f'ctfd-challenge-{int(datetime.utcnow().timestamp())}'}
+                        {'Key': 'Name', 'Value': name or f'ctfd-challenge-{int(datetime.utcnow().timestamp())}'}
                     ]
                 }
             ]
         }
         
+        # Add any caller specific tags
+        for key, value in (extra_tags or {}).items():
+            launch_params['TagSpecifications'][0]['Tags'].append({'Key': key, 'Value': value})
+        
         # Add key pair if specified
         if key_name:
             launch_params['KeyName'] = key_name
@@ -420,20 +651,32 @@ def launch_instance_from_ami(ec2_config, ami_id, instance_type, security_group,
         if user_script:
             launch_params['UserData'] = user_script
         
+        # Lets the instance read its flag tag from the metadata service
+        launch_params['MetadataOptions'] = {'InstanceMetadataTags': 'enabled'}
+        
+        # Hibernation can only be enabled at launch
+        if hibernation:
+            launch_params['HibernationOptions'] = {'Configured': True}
+        
+        if client_token:
+            launch_params['ClientToken'] = client_token
+        
         # Launch the instance
         response = ec2_client.run_instances(**launch_params)
         
-        instance_id = response['Instances'][0]['InstanceId']
-        
-        # Wait for instance to be running
-        waiter = ec2_client.get_waiter('instance_running')
-        waiter.wait(InstanceIds=[instance_id])
+        instance_ids = [instance['InstanceId'] for instance in response['Instances']]
         
-        return True, {'instance_id': instance_id, 'response': response}
+        return True, {'instance_id': instance_ids[0], 'instance_ids': instance_ids, 'response': response}
     except Exception as e:
+        if raise_retryable and is_retryable(e):
+            raise
+        # Still throttled after botocore's retries
+        if isinstance(e, ClientError) and e.response.get('Error', {}).get('Code') in THROTTLE_ERROR_CODES:
+            return False, ["AWS is busy starting other instances, please try again in a minute"]
         return False, [f"AWS error: {str(e)}"]
 
 
+@tracing.traced
 def terminate_instance(ec2_config, instance_id):
     """
     Terminate an EC2 instance
@@ -442,13 +685,7 @@ def terminate_instance(ec2_config, instance_id):
         return False, ["EC2 configuration not found!"]
     
     try:
-        ec2_client = boto3.client(
-            "ec2",
-            region_name=ec2_config.region,
-            aws_access_key_id=ec2_config.aws_access_key_id,
-            aws_secret_access_key=ec2_config.aws_secret_access_key,
-            aws_session_token=os.environ.get("AWS_SESSION_TOKEN"),
-        )
+        ec2_client = get_ec2_client(ec2_config)
         
         response = ec2_client.terminate_instances(InstanceIds=[instance_id])
         return True, response
@@ -456,93 +693,1144 @@ def terminate_instance(ec2_config, instance_id):
         return False, [f"AWS error: {str(e)}"]
 
 
-def create_instance_challenge(ec2_config, challenge_id, random_flag):
+@tracing.traced
+def terminate_instances(ec2_config, instance_ids):
     """
-    Create a challenge instance by launching a new EC2 instance from AMI with flags
+    Terminate many EC2 instances, TERMINATE_BATCH_SIZE IDs per call.
+    Returns the IDs that AWS accepted or no longer knows about, and a list of errors.
+    """
+    if not ec2_config:
+        return [], ["EC2 configuration not found!"]
+
+    ec2_client = get_ec2_client(ec2_config)
+    terminated = []
+    errors = []
+
+    for i in range(0, len(instance_ids), TERMINATE_BATCH_SIZE):
+        batch = instance_ids[i:i + TERMINATE_BATCH_SIZE]
+        try:
+            try:
+                ec2_client.terminate_instances(InstanceIds=batch)
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'InvalidInstanceID.NotFound':
+                    raise
+                # One unknown ID fails the whole call, retry with the ones that still exist
+                existing = list(describe_instance_states(ec2_config, batch))
+                if existing:
+                    ec2_client.terminate_instances(InstanceIds=existing)
+            terminated.extend(batch)
+        except Exception as e:
+            errors.append(f"AWS error: {str(e)}")
+
+    return terminated, errors
+
+
+@tracing.traced
+def stop_instance(ec2_config, instance_id, hibernate=False, raise_retryable=False):
+    """
+    Stop an EC2 instance, hibernating it when asked and supported.
+    With raise_retryable, errors worth retrying later are raised instead of returned.
     """
     if not ec2_config:
         return False, ["EC2 configuration not found!"]
     
-    # Validate required AWS settings
-    if not ec2_config.region:
-        return False, ["AWS region not configured. Please configure AWS settings first."]
+    try:
+        ec2_client = get_ec2_client(ec2_config)
+        
+        try:
+            response = ec2_client.stop_instances(InstanceIds=[instance_id], Hibernate=hibernate)
+        except ClientError as e:
+            # Instances launched before hibernation was turned on can still be stopped
+            if not hibernate or e.response['Error']['Code'] not in ('UnsupportedHibernationConfiguration', 'UnsupportedOperation'):
+                raise
+            response = ec2_client.stop_instances(InstanceIds=[instance_id])
+        return True, response
+    except Exception as e:
+        if raise_retryable and is_retryable(e):
+            raise
+        return False, [f"AWS error: {str(e)}"]
+
+
+@tracing.traced
+def replace_root_volume(ec2_config, instance_id, ami_id, client_token=None, raise_retryable=False):
+    """
+    Restore an instance's root volume from its AMI in place. The instance keeps
+    its ID and IP and is rebooted by AWS. Returns the replacement task ID.
+    Repeating a request with the same client_token returns the task of the first one.
+    With raise_retryable, errors worth retrying later are raised instead of returned.
+    """
+    if not ec2_config:
+        return False, ["EC2 configuration not found!"]
     
     try:
-        ec2_client = boto3.client(
-            "ec2",
-            region_name=ec2_config.region,
-            aws_access_key_id=ec2_config.aws_access_key_id,
-            aws_secret_access_key=ec2_config.aws_secret_access_key,
-            aws_session_token=os.environ.get("AWS_SESSION_TOKEN"),
+        ec2_client = get_ec2_client(ec2_config)
+        
+        params = {
+            'InstanceId': instance_id,
+            'ImageId': ami_id,
+            'DeleteReplacedRootVolume': True,
+        }
+        if client_token:
+            params['ClientToken'] = client_token
+        response = ec2_client.create_replace_root_volume_task(**params)
+        return True, response['ReplaceRootVolumeTask']['ReplaceRootVolumeTaskId']
+    except Exception as e:
+        if raise_retryable and is_retryable(e):
+            raise
+        return False, [f"AWS error: {str(e)}"]
+
+
+@tracing.traced
+def describe_replace_root_volume_tasks(ec2_config, task_ids):
+    """
+    Get the state of many root volume replacement tasks, DESCRIBE_BATCH_SIZE IDs per call
+    """
+    ec2_client = get_ec2_client(ec2_config)
+    states = {}
+
+    for i in range(0, len(task_ids), DESCRIBE_BATCH_SIZE):
+        response = ec2_client.describe_replace_root_volume_tasks(
+            ReplaceRootVolumeTaskIds=task_ids[i:i + DESCRIBE_BATCH_SIZE]
         )
+        for task in response['ReplaceRootVolumeTasks']:
+            states[task['ReplaceRootVolumeTaskId']] = task['TaskState']
 
-        session = get_current_user()
-        challenge = EC2Challenge.query.filter_by(id=challenge_id).first()
+    return states
 
-        # Check if user already has a running instance
-        if not is_admin():
-            if len(EC2ChallengeTracker.query.filter_by(owner_id=session.id).all()):
-                tracker = EC2ChallengeTracker.query.filter_by(owner_id=session.id).first()
-                challenge = EC2Challenge.query.filter_by(id=tracker.challenge_id).first()
-                return False, [
-                    "You already have a running instance!",
-                    challenge.name,
-                    tracker.challenge_id,
-                    tracker.instance_id,
-                ]
 
-        # Get the flags on the challenge
-        flags = Flags.query.filter_by(challenge_id=challenge_id).all()
-        
-        # Create user data script with flags
-        user_script = f"""#!/bin/bash
+@tracing.traced
+def send_reset_commands(ec2_config, challenge, instance_ids):
+    """
+    Run the challenge's reset script (or its setup script) on running instances
+    with SSM Run Command, SSM_BATCH_SIZE instances per command.
+    Returns ({instance_id: command_id}, errors) where errors are the exceptions raised.
+    """
+    ssm_client = get_client(ec2_config, "ssm")
+    script = challenge.reset_script or challenge.setup_script or ""
+    commands = {}
+    errors = []
+
+    for i in range(0, len(instance_ids), SSM_BATCH_SIZE):
+        batch = instance_ids[i:i + SSM_BATCH_SIZE]
+        try:
+            response = ssm_client.send_command(
+                InstanceIds=batch,
+                DocumentName="AWS-RunShellScript",
+                Comment=f"CTFd reset of challenge {challenge.id}",
+                Parameters={
+                    "commands": [script],
+                    "executionTimeout": [str(SSM_RESET_TIMEOUT)],
+                },
+            )
+            command_id = response['Command']['CommandId']
+            commands.update({instance_id: command_id for instance_id in batch})
+        except Exception as e:
+            errors.append(e)
+
+    return commands, errors
+
+
+@tracing.traced
+def describe_reset_commands(ec2_config, command_ids):
+    """
+    Get the status of SSM reset commands on every instance they were sent to,
+    as {(command_id, instance_id): status}
+    """
+    ssm_client = get_client(ec2_config, "ssm")
+    paginator = ssm_client.get_paginator("list_command_invocations")
+    statuses = {}
+
+    for command_id in command_ids:
+        for page in paginator.paginate(CommandId=command_id):
+            for invocation in page['CommandInvocations']:
+                statuses[(command_id, invocation['InstanceId'])] = invocation['Status']
+
+    return statuses
+
+
+@tracing.traced
+def start_instances(ec2_config, instance_ids):
+    """
+    Start many stopped EC2 instances, START_BATCH_SIZE IDs per call.
+    Returns the IDs AWS accepted and a list of errors.
+    """
+    if not ec2_config:
+        return [], ["EC2 configuration not found!"]
+
+    ec2_client = get_ec2_client(ec2_config)
+    started = []
+    errors = []
+
+    for i in range(0, len(instance_ids), START_BATCH_SIZE):
+        batch = instance_ids[i:i + START_BATCH_SIZE]
+        try:
+            ec2_client.start_instances(InstanceIds=batch)
+            started.extend(batch)
+        except Exception as e:
+            errors.append(f"AWS error: {str(e)}")
+
+    return started, errors
+
+
+def build_user_script(challenge):
+    """
+    Build the user-data script that writes the challenge flags and runs its setup script
+    """
+    # Get the flags on the challenge
+    flags = Flags.query.filter_by(challenge_id=challenge.id).all()
+    
+    # Create user data script with flags
+    user_script = f"""#!/bin/bash
 # CTF Challenge Setup Script
 echo "Setting up challenge environment..."
 
 # Set flags as environment variables
 """
-        
-        for i, flag in enumerate(flags):
-            user_script += f'echo "export FLAG_{i}={flag.content}" >> /etc/environment\n'
-        
-        user_script += f"""
+    
+    for i, flag in enumerate(flags):
+        user_script += f'echo "export FLAG_{i}={flag.content}" >> /etc/environment\n'
+    
+    user_script += FLAG_WATCH_SCRIPT
+    
+    user_script += f"""
 # Additional challenge setup
 {challenge.setup_script or ""}
 
 # Log completion
 echo "Challenge setup completed at $(date)" >> /var/log/ctf-setup.log
 """
+    return user_script
+
+
+def fail_provision(tracker_id, requested_at=None, launch_token=None, error=None):
+    """
+    Mark a tracker failed once its provision job has been dead-lettered
+    """
+    EC2ChallengeTracker.query.filter(
+        EC2ChallengeTracker.id == tracker_id,
+        EC2ChallengeTracker.instance_id.is_(None),
+    ).update({"status": "failed", "error": (error or "Launch failed")[:255]}, synchronize_session=False)
+    db.session.commit()
+
+
+@job("provision", on_dead=fail_provision)
+@tracing.traced
+def provision_instance(tracker_id, requested_at=None, launch_token=None):
+    """
+    Launch the instance for a tracker row. Runs as a queued job.
+    Capacity, throttling and connection errors are raised so the job is retried.
+    launch_token is queued with the job, so its retries share a client token and
+    never launch a second instance, while a tracker ID reused after a delete
+    gets a new one.
+    """
+    ec2_config = get_ec2_config()
+    tracker = EC2ChallengeTracker.query.filter_by(id=tracker_id).first()
+    if tracker is None:
+        # The player cancelled before we got to it
+        return
+    if tracker.instance_id:
+        # Already launched by an earlier attempt of this job
+        return
+
+    challenge = get_challenge_params(tracker.challenge_id)
+    if challenge is None:
+        EC2ChallengeTracker.query.filter_by(id=tracker_id).update(
+            {"status": "failed", "error": "Challenge not found"}
+        )
+        db.session.commit()
+        return
+
+    # Warm pool instances are tagged so they can be told apart in the AWS console,
+    # they get their flag when they are claimed
+    if tracker.owner_id is None:
+        extra_tags = {'ctfd-pool': 'unassigned'}
+    else:
+        extra_tags = {FLAG_TAG: tracker.flag} if tracker.flag else None
+
+    # Jobs queued before launch tokens existed
+    if launch_token is None:
+        launch_token = f"{tracker_id}-{tracker.timestamp}"
+
+    success, result = launch_instance_from_ami(
+        ec2_config,
+        challenge.ami_id,
+        challenge.instance_type,
+        challenge.security_group,
+        challenge.key_name,
+        challenge.subnet_id,
+        build_user_script(challenge),
+        extra_tags,
+        hibernation=challenge.reset_strategy == "hibernate",
+        client_token=f"ctfd-launch-{launch_token}",
+        raise_retryable=True,
+        name=f"ctfd-challenge-{tracker.timestamp}",
+    )
+
+    if success:
+        if requested_at is not None:
+            metrics.LAUNCH_REQUEST_SECONDS.observe(time.time() - requested_at)
+        instance_id = result['instance_id']
+        updated = EC2ChallengeTracker.query.filter_by(id=tracker_id).update(
+            {"instance_id": instance_id, "status": "pending"}
+        )
+        db.session.commit()
+
+        # The tracker was removed while we were launching, don't leak the instance
+        if not updated:
+            terminate_instance(ec2_config, instance_id)
+    else:
+        EC2ChallengeTracker.query.filter_by(id=tracker_id).update(
+            {"status": "failed", "error": str(result[0])[:255]}
+        )
+        db.session.commit()
+
+
+@tracing.traced
+def tag_instance(ec2_config, instance_id, tags):
+    """
+    Add or overwrite tags on an EC2 instance
+    """
+    if not ec2_config:
+        return False, ["EC2 configuration not found!"]
+    
+    try:
+        ec2_client = get_ec2_client(ec2_config)
+        
+        response = ec2_client.create_tags(
+            Resources=[instance_id],
+            Tags=[{'Key': key, 'Value': value} for key, value in tags.items()]
+        )
+        return True, response
+    except Exception as e:
+        return False, [f"AWS error: {str(e)}"]
+
+
+@tracing.traced
+def claim_warm_instance(challenge, owner_id, random_flag):
+    """
+    Atomically hand an unassigned warm pool instance to a player.
+    Returns the claimed tracker or None if the pool is empty.
+    """
+    # Prefer instances that are already booted
+    candidates = (
+        EC2ChallengeTracker.query.filter_by(challenge_id=challenge.id, owner_id=None)
+        .filter(EC2ChallengeTracker.status.in_(["ready", "pending"]))
+        .order_by(
+            db.case((EC2ChallengeTracker.status == "ready", 0), else_=1),
+            EC2ChallengeTracker.timestamp,
+        )
+        .limit(5)
+        .all()
+    )
+
+    now = unix_time(datetime.utcnow())
+    for candidate in candidates:
+        # Only one request can flip owner_id away from NULL
+        claimed = EC2ChallengeTracker.query.filter_by(
+            id=candidate.id, owner_id=None
+        ).update(
+            {
+                "owner_id": owner_id,
+                "timestamp": now,
+                "revert_time": now + challenge.auto_stop_time,
+                "flag": random_flag,
+                "status": "pending",
+            },
+            synchronize_session=False,
+        )
+        db.session.commit()
+        if claimed:
+            return EC2ChallengeTracker.query.filter_by(id=candidate.id).first()
+    return None
+
+
+@job("tag_claimed")
+@tracing.traced
+def tag_claimed_instance(tracker_id):
+    """
+    Retag a warm pool instance once it has been assigned and deliver the player's
+    flag to it. Runs as a queued job, retried until the flag is delivered.
+    """
+    ec2_config = get_ec2_config()
+    tracker = EC2ChallengeTracker.query.filter_by(id=tracker_id).first()
+    if tracker is None or not tracker.instance_id:
+        return
+
+    tags = {'ctfd-pool': 'assigned', 'ctfd-owner': str(tracker.owner_id)}
+    if tracker.flag:
+        tags[FLAG_TAG] = tracker.flag
+    success, result = tag_instance(ec2_config, tracker.instance_id, tags)
+    if not success:
+        raise RuntimeError(f"Failed to tag claimed instance {tracker.instance_id}: {result[0]}")
+
+
+def replenish_warm_pools():
+    """
+    Keep warm_pool_size unassigned instances launched for every challenge.
+    Runs periodically in the background.
+    """
+    ec2_config = get_ec2_config()
+    if not ec2_config or not ec2_config.region:
+        return
+
+    # Launch failures are retried on the next pass
+    failed = EC2ChallengeTracker.query.filter_by(owner_id=None, status="failed").all()
+    for tracker in failed:
+        print(f"ERROR: Warm pool launch for challenge {tracker.challenge_id} failed: {tracker.error}")
+    if failed:
+        EC2ChallengeTracker.query.filter(
+            EC2ChallengeTracker.id.in_([t.id for t in failed])
+        ).delete(synchronize_session=False)
+        db.session.commit()
+
+    # Bulk provisioned instances are handed out but never topped up or shrunk
+    pooled = (
+        EC2ChallengeTracker.query.filter_by(owner_id=None, batch_id=None)
+        .order_by(EC2ChallengeTracker.timestamp.desc())
+        .all()
+    )
+    pools = {}
+    for tracker in pooled:
+        pools.setdefault(tracker.challenge_id, []).append(tracker)
+
+    sizes = {
+        c.id: c.warm_pool_size or 0
+        for c in EC2Challenge.query.filter(
+            db.or_(EC2Challenge.warm_pool_size > 0, EC2Challenge.id.in_(list(pools)))
+        ).all()
+    }
+
+    now = unix_time(datetime.utcnow())
+    for challenge_id in set(sizes) | set(pools):
+        size = sizes.get(challenge_id, 0)
+        pool = pools.get(challenge_id, [])
+
+        # Shrink: drop the newest instances, which are the least likely to be booted
+        surplus = {t.id: t.instance_id for t in pool[: max(len(pool) - size, 0)]}
+        if surplus:
+            # Skip instances a player claimed since we loaded the pool
+            EC2ChallengeTracker.query.filter(
+                EC2ChallengeTracker.id.in_(list(surplus)),
+                EC2ChallengeTracker.owner_id.is_(None),
+            ).delete(synchronize_session=False)
+            kept = {
+                tracker_id for (tracker_id,) in db.session.query(EC2ChallengeTracker.id)
+                .filter(EC2ChallengeTracker.id.in_(list(surplus)))
+            }
+            db.session.commit()
+            instance_ids = [
+                instance_id for tracker_id, instance_id in surplus.items()
+                if instance_id and tracker_id not in kept
+            ]
+            if instance_ids:
+                enqueue("terminate_instances", instance_ids)
+
+        # Grow: tracker rows first so other processes count them straight away
+        for _ in range(size - len(pool)):
+            entry = EC2ChallengeTracker(
+                challenge_id=challenge_id,
+                timestamp=now,
+                status="provisioning",
+            )
+            db.session.add(entry)
+            db.session.commit()
+            enqueue("provision", entry.id, None, uuid.uuid4().hex)
+
+
+@tracing.traced
+def bulk_provision_instances(ec2_config, challenge, count):
+    """
+    Pre-provision up to count unassigned instances for a challenge with a single
+    RunInstances call. Players claim them like warm pool instances.
+    Returns the batch ID and the tracker rows created.
+    """
+    batch_id = f"{challenge.id}-{int(time.time())}-{random.randint(0, 0xffff):04x}"
+
+    success, result = launch_instance_from_ami(
+        ec2_config,
+        challenge.ami_id,
+        challenge.instance_type,
+        challenge.security_group,
+        challenge.key_name,
+        challenge.subnet_id,
+        build_user_script(challenge),
+        {'ctfd-pool': 'unassigned', 'ctfd-batch': batch_id},
+        count=count,
+        hibernation=challenge.reset_strategy == "hibernate"
+    )
+    if not success:
+        return False, result
+
+    now = unix_time(datetime.utcnow())
+    try:
+        trackers = [
+            EC2ChallengeTracker(
+                challenge_id=challenge.id,
+                instance_id=instance_id,
+                timestamp=now,
+                status="pending",
+                batch_id=batch_id,
+            )
+            for instance_id in result['instance_ids']
+        ]
+        db.session.add_all(trackers)
+        db.session.commit()
+    except Exception as e:
+        # Without tracker rows nothing would ever terminate these
+        db.session.rollback()
+        terminate_instances(ec2_config, result['instance_ids'])
+        return False, [f"Failed to record instances: {str(e)}"]
+
+    return True, {'batch_id': batch_id, 'trackers': trackers}
+
+
+def format_host(challenge, public_ip):
+    """
+    Format a public IP with the challenge's connection scheme and port
+    """
+    formatted_ip = public_ip
+    if public_ip:
+        # Add scheme if configured
+        if challenge.scheme:
+            formatted_ip = f"{challenge.scheme}://{public_ip}"
+        
+        # Add port if configured
+        if challenge.port:
+            if challenge.scheme:
+                # If scheme is present, add port after the IP
+                formatted_ip = f"{challenge.scheme}://{public_ip}:{challenge.port}"
+            else:
+                # If no scheme, just add port
+                formatted_ip = f"{public_ip}:{challenge.port}"
+    return formatted_ip
+
+
+@tracing.traced
+def describe_instance_states(ec2_config, instance_ids):
+    """
+    Get the state and public IP of many instances, DESCRIBE_BATCH_SIZE IDs per call.
+    Instances AWS no longer knows about are left out of the result.
+    """
+    ec2_client = get_ec2_client(ec2_config)
+    states = {}
+
+    for i in range(0, len(instance_ids), DESCRIBE_BATCH_SIZE):
+        batch = instance_ids[i:i + DESCRIBE_BATCH_SIZE]
+        try:
+            response = ec2_client.describe_instances(InstanceIds=batch)
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'InvalidInstanceID.NotFound':
+                raise
+            # One unknown ID fails the whole call, the filter form skips them instead
+            response = ec2_client.describe_instances(
+                Filters=[{'Name': 'instance-id', 'Values': batch}]
+            )
+
+        for reservation in response['Reservations']:
+            for instance in reservation['Instances']:
+                launch_time = instance.get('LaunchTime')
+                states[instance['InstanceId']] = {
+                    'state': instance['State']['Name'],
+                    'public_ip': instance.get('PublicIpAddress', ''),
+                    'launch_time': launch_time.timestamp() if launch_time else None,
+                }
+
+    return states
+
+
+def get_instance_state(tracker_id):
+    """
+    Get the last state the poller saw for a tracker's instance
+    """
+    return cache.get(f"ec2_instance_state_{tracker_id}")
+
+
+def wake_poller():
+    """
+    Run the poller early for an instance it hasn't seen yet. Woken runs skip the
+    poll interval, so they are limited to one every POLL_WAKE_INTERVAL seconds
+    across all processes.
+    """
+    if cache.add("ec2_poller_woken", 1, timeout=POLL_WAKE_INTERVAL):
+        wake("instance_poller")
+
+
+def poll_instance_states():
+    """
+    Describe every tracked instance in batches and publish state and host per
+    tracker to the shared cache. Runs periodically in the background.
+    """
+    ec2_config = get_ec2_config()
+    if not ec2_config or not ec2_config.region:
+        return
+
+    trackers = EC2ChallengeTracker.query.filter(
+        EC2ChallengeTracker.instance_id.isnot(None)
+    ).all()
+    if not trackers:
+        return
+
+    states = describe_instance_states(ec2_config, [t.instance_id for t in trackers])
+    challenges = {
+        challenge_id: get_challenge_params(challenge_id)
+        for challenge_id in {t.challenge_id for t in trackers}
+    }
+
+    keys = [f"ec2_instance_state_{t.id}" for t in trackers]
+    previous = dict(zip(keys, cache.get_many(*keys)))
+
+    now = unix_time(datetime.utcnow())
+    clock = time.time()
+    published = {}
+    ready = []
+    restart = []
+    tasks = []
+    for key, tracker in zip(keys, trackers):
+        instance = states.get(tracker.instance_id)
+        if instance is None:
+            # DescribeInstances is eventually consistent, brand new instances can be missing
+            recent = now - (tracker.timestamp or 0) < LAUNCH_GRACE_PERIOD
+            instance = {'state': 'pending' if recent else 'terminated', 'public_ip': ''}
+        challenge = challenges.get(tracker.challenge_id)
+        host = format_host(challenge, instance['public_ip']) if challenge else instance['public_ip']
+
+        # Launch phase timings, measured at poll granularity
+        before = previous[key] or {}
+        running_since = before.get('running_since')
+        if instance['state'] == 'running' and running_since is None:
+            running_since = clock
+            if instance.get('launch_time'):
+                metrics.LAUNCH_BOOT_SECONDS.observe(max(clock - instance['launch_time'], 0))
+        if instance['public_ip'] and not before.get('host') and running_since is not None:
+            metrics.LAUNCH_IP_SECONDS.observe(clock - running_since)
+
+        published[key] = {
+            'state': instance['state'],
+            'host': host,
+            'updated': now,
+            'running_since': running_since,
+            # Lets status streams follow the tracker without querying it
+            'status': tracker.status,
+            'error': tracker.error if tracker.status == "failed" else None,
+        }
+
+        # Keep the host field on the tracker in sync for the admin pages
+        if instance['public_ip'] and tracker.host != host:
+            tracker.host = host
+
+        if tracker.owner_id is None and tracker.status == "pending" and instance['state'] == 'running':
+            ready.append(tracker.id)
+
+        if tracker.status == "resetting":
+            strategy = challenge.reset_strategy if challenge else "stop"
+            if strategy == "replace_root":
+                if tracker.reset_task_id:
+                    tasks.append((key, tracker, strategy))
+                published[key]['reset_step'] = "restoring the root volume"
+            elif strategy == "ssm":
+                if tracker.reset_task_id:
+                    tasks.append((key, tracker, strategy))
+                published[key]['reset_step'] = "running the reset script"
+            elif instance['state'] == 'stopped':
+                restart.append((key, tracker))
+                published[key]['reset_step'] = "starting the instance"
+            else:
+                published[key]['reset_step'] = "hibernating the instance" if strategy == "hibernate" else "stopping the instance"
+
+    db.session.commit()
+
+    if tasks:
+        # In-place resets that run as AWS tasks on the running instance
+        root_tasks = describe_replace_root_volume_tasks(
+            ec2_config, [t.reset_task_id for _, t, strategy in tasks if strategy == "replace_root"]
+        )
+        commands = describe_reset_commands(
+            ec2_config, {t.reset_task_id for _, t, strategy in tasks if strategy == "ssm"}
+        )
+        for key, tracker, strategy in tasks:
+            if strategy == "replace_root":
+                task_state = root_tasks.get(tracker.reset_task_id, "pending")
+                done = task_state == "succeeded"
+                failed = task_state in REPLACE_ROOT_FAILED_STATES
+                step = f"restoring the root volume ({task_state})"
+            else:
+                # The invocation can take a moment to show up after SendCommand
+                task_state = commands.get((tracker.reset_task_id, tracker.instance_id), "Pending")
+                done = task_state == "Success"
+                failed = task_state in SSM_FAILED_STATUSES
+                step = f"running the reset script ({task_state})"
+
+            if done:
+                # Same instance and IP, nothing left to wait for
+                EC2ChallengeTracker.query.filter_by(id=tracker.id, status="resetting").update(
+                    {"status": "pending", "reset_task_id": None}, synchronize_session=False
+                )
+                published[key].pop('reset_step', None)
+            elif failed:
+                EC2ChallengeTracker.query.filter_by(id=tracker.id).update(
+                    {"status": "failed", "error": f"Reset failed while {step}"},
+                    synchronize_session=False,
+                )
+            else:
+                published[key]['reset_step'] = step
+        db.session.commit()
+
+    if restart:
+        # Second half of an in-place reset, start everything that finished stopping
+        started, errors = start_instances(ec2_config, [t.instance_id for _, t in restart])
+        for error in errors:
+            print(f"ERROR: Failed to start reset instances: {error}")
+        started = set(started)
+        resumed = [t.id for _, t in restart if t.instance_id in started]
+        failed = [t.id for _, t in restart if t.instance_id not in started]
+        for key, tracker in restart:
+            if tracker.instance_id in started:
+                published[key] = {'state': 'pending', 'host': '', 'updated': now, 'running_since': None}
+        if resumed:
+            EC2ChallengeTracker.query.filter(
+                EC2ChallengeTracker.id.in_(resumed),
+                EC2ChallengeTracker.status == "resetting",
+            ).update({"status": "pending"}, synchronize_session=False)
+        if failed:
+            EC2ChallengeTracker.query.filter(EC2ChallengeTracker.id.in_(failed)).update(
+                {"status": "failed", "error": "Failed to start the instance after a reset"},
+                synchronize_session=False,
+            )
+        db.session.commit()
+
+    if ready:
+        # Guard on owner_id so a claim that happened meanwhile is left alone
+        EC2ChallengeTracker.query.filter(
+            EC2ChallengeTracker.id.in_(ready),
+            EC2ChallengeTracker.owner_id.is_(None),
+        ).update({"status": "ready"}, synchronize_session=False)
+        db.session.commit()
+
+    cache.set_many(published, timeout=max(POLL_INTERVAL * 6, 60))
+
+
+def not_terminating():
+    """
+    Filter for trackers that still belong to a player, i.e. not solved and waiting for termination
+    """
+    return db.or_(
+        EC2ChallengeTracker.status.is_(None),
+        EC2ChallengeTracker.status != "terminating",
+    )
+
+
+@tracing.traced
+def terminate_trackers(ec2_config, trackers):
+    """
+    Terminate the instances behind a set of tracker rows (id, instance_id,
+    owner_id, challenge_id, timestamp, status) in batches, then delete the
+    trackers whose instances are gone in one query.
+    Returns the deleted tracker IDs and a list of errors.
+    """
+    terminated, errors = terminate_instances(
+        ec2_config, [t.instance_id for t in trackers if t.instance_id]
+    )
+
+    # Trackers still provisioning are cleaned up by their background launch
+    terminated = set(terminated)
+    removed = [t for t in trackers if not t.instance_id or t.instance_id in terminated]
+    if removed:
+        EC2ChallengeTracker.query.filter(
+            EC2ChallengeTracker.id.in_([t.id for t in removed])
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        for tracker in removed:
+            record_end(tracker, solved=tracker.status == "terminating")
+    removed = [t.id for t in removed]
+
+    return removed, errors
+
+
+def release_trackers(trackers):
+    """
+    Delete tracker rows (id, instance_id, owner_id, challenge_id, timestamp,
+    status) and queue the termination of their instances.
+    Returns the deleted tracker IDs.
+    """
+    if not trackers:
+        return []
+
+    EC2ChallengeTracker.query.filter(
+        EC2ChallengeTracker.id.in_([t.id for t in trackers])
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    for tracker in trackers:
+        record_end(tracker, solved=tracker.status == "terminating")
+
+    # Trackers still provisioning are cleaned up by their background launch
+    instance_ids = [t.instance_id for t in trackers if t.instance_id]
+    for i in range(0, len(instance_ids), TERMINATE_BATCH_SIZE):
+        enqueue("terminate_instances", instance_ids[i:i + TERMINATE_BATCH_SIZE])
+
+    return [t.id for t in trackers]
+
+
+@job("terminate_instances")
+def terminate_queued_instances(instance_ids):
+    """
+    Terminate instances whose trackers are already gone. Runs as a queued job.
+    """
+    terminated, errors = terminate_instances(get_ec2_config(), instance_ids)
+    if errors:
+        # Terminating an instance twice is harmless, so the whole batch is retried
+        raise RuntimeError(errors[0])
+
+
+@job("terminate_solved")
+def terminate_solved_instance(tracker_id):
+    """
+    Terminate the instance of a solved challenge and delete its tracker. Runs as
+    a queued job; should the job never be queued (e.g. the process stopped right
+    after the solve) the reaper picks the tracker up once its revert time, pushed
+    SOLVE_TERMINATE_RETRY_DELAY past the solve, has passed.
+    """
+    ec2_config = get_ec2_config()
+    trackers = (
+        db.session.query(
+            EC2ChallengeTracker.id,
+            EC2ChallengeTracker.instance_id,
+            EC2ChallengeTracker.owner_id,
+            EC2ChallengeTracker.challenge_id,
+            EC2ChallengeTracker.timestamp,
+            EC2ChallengeTracker.status,
+        )
+        .filter_by(id=tracker_id, status="terminating")
+        .all()
+    )
+    if not trackers:
+        return
+
+    removed, errors = terminate_trackers(ec2_config, trackers)
+    if errors:
+        EC2ChallengeTracker.query.filter_by(id=tracker_id).update({"error": errors[0][:255]})
+        db.session.commit()
+        raise RuntimeError(errors[0])
+
+
+def reap_expired_instances():
+    """
+    Terminate instances past their revert time (or the global maximum instance
+    time) and delete their trackers. Runs periodically in the background.
+    Solved instances whose termination failed are picked up here as well, even
+    with auto-stop disabled.
+    """
+    ec2_config = get_ec2_config()
+    if not ec2_config or not ec2_config.region:
+        return
+
+    now = unix_time(datetime.utcnow())
+    expired_filter = EC2ChallengeTracker.revert_time <= now
+    if not ec2_config.auto_stop_enabled:
+        expired_filter = db.and_(expired_filter, EC2ChallengeTracker.status == "terminating")
+    elif ec2_config.max_instance_time:
+        expired_filter = db.or_(
+            expired_filter,
+            EC2ChallengeTracker.timestamp <= now - ec2_config.max_instance_time,
+        )
+
+    # Warm pool instances have no owner and never expire
+    expired = (
+        db.session.query(
+            EC2ChallengeTracker.id,
+            EC2ChallengeTracker.instance_id,
+            EC2ChallengeTracker.owner_id,
+            EC2ChallengeTracker.challenge_id,
+            EC2ChallengeTracker.timestamp,
+            EC2ChallengeTracker.status,
+        )
+        .filter(expired_filter, EC2ChallengeTracker.owner_id.isnot(None))
+        .limit(REAPER_BATCH_LIMIT)
+        .all()
+    )
+    if not expired:
+        return
+
+    # Trackers whose termination failed are kept and retried on the next pass
+    reaped, errors = terminate_trackers(ec2_config, expired)
+    for error in errors:
+        print(f"ERROR: Failed to terminate expired instances: {error}")
+    if reaped:
+        metrics.REAPED.inc(amount=len(reaped))
+
+
+def validate_reset_strategy(strategy, reset_script, setup_script):
+    """
+    Raise ValueError for an unknown reset strategy, or SSM resets with no script to run
+    """
+    if strategy not in RESET_STRATEGIES:
+        raise ValueError(f"Invalid reset strategy: {strategy}")
+    if strategy == "ssm" and not (reset_script or setup_script):
+        raise ValueError("The SSM reset strategy needs a reset script or a setup script")
+
+
+@tracing.traced
+def reset_instance_in_place(challenge, tracker):
+    """
+    Reset a player's instance without replacing it, as set by the challenge's
+    reset strategy. The tracker keeps its instance ID and moves to resetting
+    until the instance is back. Returns False when the challenge relaunches on
+    reset or the instance can't be reused, so the caller should relaunch.
+    """
+    strategy = challenge.reset_strategy or "relaunch"
+    if strategy == "relaunch" or not tracker.instance_id or tracker.status == "failed":
+        return False
+
+    # Challenges saved before SSM needed a script have nothing to run
+    if strategy == "ssm" and not (challenge.reset_script or challenge.setup_script):
+        return False
+
+    # Root volume replacement and SSM need a running instance
+    cached = get_instance_state(tracker.id)
+    if strategy in TASK_RESET_STRATEGIES and (cached is None or cached["state"] != "running"):
+        return False
+
+    if cached is not None and cached["state"] in ("shutting-down", "terminated"):
+        return False
+
+    previous_start = tracker.timestamp
+    now = unix_time(datetime.utcnow())
+    updated = EC2ChallengeTracker.query.filter(
+        EC2ChallengeTracker.id == tracker.id,
+        # Rows from before the status column have no status
+        db.or_(EC2ChallengeTracker.status.is_(None), EC2ChallengeTracker.status != "resetting"),
+    ).update(
+        {
+            "status": "resetting",
+            "error": None,
+            "reset_task_id": None,
+            "timestamp": now,
+            "revert_time": now + challenge.auto_stop_time,
+        },
+        synchronize_session=False,
+    )
+    db.session.commit()
+
+    # A second reset while one is running just waits for the first
+    if not updated:
+        return EC2ChallengeTracker.query.filter_by(id=tracker.id, status="resetting").count() > 0
+
+    # The reset ends the player's session and starts a new one on the same instance
+    record_end(tracker, start_time=previous_start)
+    record_start(tracker)
+    enqueue("reset", tracker.id)
+    return True
+
+
+def fail_reset(tracker_id, error=None):
+    """
+    Mark a tracker failed once its reset job has been dead-lettered
+    """
+    EC2ChallengeTracker.query.filter_by(id=tracker_id, status="resetting").update(
+        {"status": "failed", "error": (error or "Reset failed")[:255]}, synchronize_session=False
+    )
+    db.session.commit()
+
+
+@job("reset", on_dead=fail_reset)
+def begin_reset(tracker_id):
+    """
+    Start the in-place reset of a tracker's instance. Runs as a queued job.
+    The poller follows the reset from here: it starts stopped instances again and
+    watches root volume replacement tasks and SSM commands. Errors worth retrying
+    are raised so the job is retried.
+    """
+    ec2_config = get_ec2_config()
+    tracker = EC2ChallengeTracker.query.filter_by(id=tracker_id, status="resetting").first()
+    if tracker is None or not tracker.instance_id or tracker.reset_task_id:
+        return
+
+    challenge = get_challenge_params(tracker.challenge_id)
+    strategy = challenge.reset_strategy if challenge is not None else "stop"
+
+    if strategy == "ssm":
+        send_ssm_resets(challenge.id, [tracker_id])
+        return
+
+    if strategy == "replace_root":
+        # Keyed on when the reset started, so a retry reuses the task and a later reset gets a new one
+        success, result = replace_root_volume(
+            ec2_config,
+            tracker.instance_id,
+            challenge.ami_id,
+            client_token=f"ctfd-reset-{tracker_id}-{tracker.timestamp}",
+            raise_retryable=True,
+        )
+        if success:
+            EC2ChallengeTracker.query.filter_by(id=tracker_id).update({"reset_task_id": result})
+            db.session.commit()
+            return
+    else:
+        success, result = stop_instance(ec2_config, tracker.instance_id, strategy == "hibernate", raise_retryable=True)
+
+    if not success:
+        EC2ChallengeTracker.query.filter_by(id=tracker_id).update(
+            {"status": "failed", "error": str(result[0])[:255]}
+        )
+        db.session.commit()
+
+
+def fail_ssm_resets(challenge_id, tracker_ids, error=None):
+    """
+    Mark trackers failed whose reset command was still not sent when the
+    ssm_reset job was dead-lettered
+    """
+    EC2ChallengeTracker.query.filter(
+        EC2ChallengeTracker.id.in_(tracker_ids),
+        EC2ChallengeTracker.status == "resetting",
+        EC2ChallengeTracker.reset_task_id.is_(None),
+    ).update({"status": "failed", "error": (error or "Reset command was not sent")[:255]}, synchronize_session=False)
+    db.session.commit()
+
+
+@job("ssm_reset", on_dead=fail_ssm_resets)
+def send_ssm_resets(challenge_id, tracker_ids):
+    """
+    Send the SSM reset commands for trackers already moved to resetting and
+    store each command ID on its tracker. Runs as a queued job. When a batch hit
+    an error worth retrying the job raises after storing the commands that were
+    sent, and the retry only sends the missing ones.
+    """
+    ec2_config = get_ec2_config()
+    challenge = get_challenge_params(challenge_id)
+    trackers = EC2ChallengeTracker.query.filter(
+        EC2ChallengeTracker.id.in_(tracker_ids),
+        EC2ChallengeTracker.status == "resetting",
+        EC2ChallengeTracker.instance_id.isnot(None),
+        EC2ChallengeTracker.reset_task_id.is_(None),
+    ).all()
+    if not trackers:
+        return
+
+    commands, errors = send_reset_commands(ec2_config, challenge, [t.instance_id for t in trackers])
+    retry = next((e for e in errors if is_retryable(e)), None)
+
+    # One update per command rather than per tracker
+    by_command = {}
+    for tracker in trackers:
+        by_command.setdefault(commands.get(tracker.instance_id), []).append(tracker.id)
+    for command_id, ids in by_command.items():
+        if command_id:
+            values = {"reset_task_id": command_id}
+        elif retry is not None:
+            # Left resetting for the retry
+            continue
+        else:
+            error = f"AWS error: {str(errors[0])}" if errors else "Reset command was not sent"
+            values = {"status": "failed", "error": error[:255]}
+        EC2ChallengeTracker.query.filter(EC2ChallengeTracker.id.in_(ids)).update(
+            values, synchronize_session=False
+        )
+    db.session.commit()
+
+    if retry is not None:
+        raise retry
+
+
+@tracing.traced
+def bulk_reset_instances(challenge):
+    """
+    Reset every assigned, running instance of a challenge in place over SSM.
+    Returns the IDs of the trackers being reset.
+    """
+    candidates = EC2ChallengeTracker.query.filter(
+        EC2ChallengeTracker.challenge_id == challenge.id,
+        EC2ChallengeTracker.owner_id.isnot(None),
+        EC2ChallengeTracker.instance_id.isnot(None),
+        # Rows from before the status column have no status
+        db.or_(
+            EC2ChallengeTracker.status.is_(None),
+            EC2ChallengeTracker.status.notin_(("resetting", "failed", "terminating")),
+        ),
+    ).all()
+    tracker_ids = [
+        t.id for t in candidates
+        if (get_instance_state(t.id) or {}).get("state") == "running"
+    ]
+    if not tracker_ids:
+        return []
+
+    EC2ChallengeTracker.query.filter(
+        EC2ChallengeTracker.id.in_(tracker_ids),
+        db.or_(
+            EC2ChallengeTracker.status.is_(None),
+            EC2ChallengeTracker.status.notin_(("resetting", "terminating")),
+        ),
+    ).update(
+        {"status": "resetting", "error": None, "reset_task_id": None},
+        synchronize_session=False,
+    )
+    db.session.commit()
+
+    enqueue("ssm_reset", challenge.id, tracker_ids)
+    return tracker_ids
+
+
+@tracing.traced
+def create_instance_challenge(ec2_config, challenge_id, random_flag):
+    """
+    Create a challenge instance. The tracker row is written immediately and the
+    EC2 instance is launched from the AMI in the background.
+    """
+    if not ec2_config:
+        return False, ["EC2 configuration not found!"]
+    
+    # Validate required AWS settings
+    if not ec2_config.region:
+        return False, ["AWS region not configured. Please configure AWS settings first."]
+    
+    try:
+        session = get_current_user()
+        challenge = get_challenge_params(challenge_id)
+
+        # Check if user already has a running instance
+        if not is_admin():
+            # Solved instances that are still shutting down don't count
+            tracker = EC2ChallengeTracker.query.filter_by(owner_id=session.id).filter(not_terminating()).first()
+            if tracker is not None:
+                challenge = get_challenge_params(tracker.challenge_id)
+                return False, [
+                    "You already have a running instance!",
+                    challenge.name,
+                    tracker.challenge_id,
+                    tracker.instance_id,
+                    tracker.id,
+                ]
 
-        # Launch the instance from AMI
-        success, result = launch_instance_from_ami(
-            ec2_config,
-            challenge.ami_id,
-            challenge.instance_type,
-            challenge.security_group,
-            challenge.key_name,
-            challenge.subnet_id,
-            user_script
+        # Hand out a pre-launched instance from the warm pool or a bulk batch
+        tracker = claim_warm_instance(challenge, session.id, random_flag)
+        if challenge.warm_pool_size:
+            wake("warm_pool")
+        if tracker is not None:
+            metrics.LAUNCHES.inc("batch" if tracker.batch_id else "warm_pool")
+            tracing.bind_tracker(tracker.id)
+            record_start(tracker)
+            enqueue("tag_claimed", tracker.id)
+            return True, {'tracker_id': tracker.id}
+
+        # Create tracker entry
+        entry = EC2ChallengeTracker(
+            owner_id=session.id,
+            challenge_id=challenge.id,
+            timestamp=unix_time(datetime.utcnow()),
+            revert_time=unix_time(datetime.utcnow()) + challenge.auto_stop_time,
+            flag=random_flag,
+            status="provisioning",
         )
         
-        if success:
-            instance_id = result['instance_id']
-            
-            # Create tracker entry
-            entry = EC2ChallengeTracker(
-                owner_id=session.id,
-                challenge_id=challenge.id,
-                instance_id=instance_id,
-                timestamp=unix_time(datetime.utcnow()),
-                revert_time=unix_time(datetime.utcnow()) + challenge.auto_stop_time,
-                flag=random_flag,
-            )
-            
-            db.session.add(entry)
-            db.session.commit()
-            
-            return True, result
-        else:
-            return False, result
+        db.session.add(entry)
+        db.session.commit()
+
+        metrics.LAUNCHES.inc("new")
+        tracing.bind_tracker(entry.id)
+        record_start(entry)
+        enqueue("provision", entry.id, time.time(), uuid.uuid4().hex)
+        
+        return True, {'tracker_id': entry.id}
             
     except Exception as e:
         return False, [f"AWS error: {str(e)}"]
@@ -577,11 +1865,18 @@ class EC2ChallengeType(BaseChallenge):
         data = request.form or request.get_json()
         
         challenge = EC2Challenge.query.filter_by(id=challenge.id).first()
+        validate_reset_strategy(
+            data.get("reset_strategy", challenge.reset_strategy or "relaunch"),
+            data.get("reset_script", challenge.reset_script),
+            data.get("setup_script", challenge.setup_script),
+        )
+        
         for attr, value in data.items():
             if hasattr(challenge, attr):
                 setattr(challenge, attr, value)
         
         db.session.commit()
+        clear_challenge_params(challenge.id)
         return challenge
 
     @staticmethod
@@ -601,13 +1896,15 @@ class EC2ChallengeType(BaseChallenge):
         EC2Challenge.query.filter_by(id=challenge.id).delete()
         Challenges.query.filter_by(id=challenge.id).delete()
         db.session.commit()
+        clear_challenge_params(challenge.id)
+        # Bulk deletes skip the Flags events that normally clear this
+        clear_challenge_flags(challenge.id)
 
     @staticmethod
     def read(challenge):
         """
         This method is used to read the information associated with a challenge.
         """
-        challenge = EC2Challenge.query.filter_by(id=challenge.id).first()
         data = {
             "id": challenge.id,
             "name": challenge.name,
@@ -625,8 +1922,11 @@ class EC2ChallengeType(BaseChallenge):
             "scheme": challenge.scheme,
             "port": challenge.port,
             "setup_script": challenge.setup_script,
+            "reset_script": challenge.reset_script,
             "guide": challenge.guide,
             "auto_stop_time": challenge.auto_stop_time,
+            "warm_pool_size": challenge.warm_pool_size,
+            "reset_strategy": challenge.reset_strategy,
             "type_data": {
                 "id": EC2ChallengeType.id,
                 "name": EC2ChallengeType.name,
@@ -658,14 +1958,19 @@ class EC2ChallengeType(BaseChallenge):
                 'scheme': '',
                 'port': '',
                 'setup_script': '',
+                'reset_script': '',
                 'guide': '',
-                'auto_stop_time': 1800
+                'auto_stop_time': 1800,
+                'warm_pool_size': 0,
+                'reset_strategy': 'relaunch'
             }
             
             for field, default_value in optional_fields.items():
                 if field not in data:
                     data[field] = default_value
             
+            validate_reset_strategy(data['reset_strategy'], data['reset_script'], data['setup_script'])
+            
             print(f"DEBUG: Creating EC2Challenge object")
             challenge = EC2Challenge(**data)
             print(f"DEBUG: EC2Challenge object created: {challenge}")
@@ -691,11 +1996,21 @@ class EC2ChallengeType(BaseChallenge):
         """
         data = request.form or request.get_json()
         submission = data["submission"].strip()
-        flags = Flags.query.filter_by(challenge_id=challenge.id).all()
 
-        for flag in flags:
-            if flag.content == submission:
-                return True, "Correct!"
+        if is_challenge_flag(challenge.id, submission):
+            return True, "Correct!"
+
+        # The flag delivered to this player's instance
+        session = get_current_user()
+        tracker = (
+            db.session.query(EC2ChallengeTracker.flag)
+            .filter_by(owner_id=session.id, challenge_id=challenge.id)
+            .first()
+        )
+        if tracker is not None and tracker.flag and hmac.compare_digest(
+            tracker.flag.encode(), submission.encode()
+        ):
+            return True, "Correct!"
 
         return False, "Incorrect!"
 
@@ -704,7 +2019,6 @@ class EC2ChallengeType(BaseChallenge):
         """
         This method is used to insert Solves for the admin panel.
         """
-        challenge = EC2Challenge.query.filter_by(id=challenge.id).first()
         data = request.form or request.get_json()
         submission = data["submission"].strip()
 
@@ -717,18 +2031,30 @@ class EC2ChallengeType(BaseChallenge):
         )
         db.session.add(solve)
 
-        # Terminate the instance when solved
-        ec2_config = EC2Config.query.filter_by(id=1).first()
+        # Terminate the instance when solved. The solve is committed first and
+        # the termination runs in the background, so AWS can't hold it up
         tracker = EC2ChallengeTracker.query.filter_by(
             challenge_id=challenge.id, owner_id=user.id
-        ).first()
+        ).filter(not_terminating()).first()
         
-        if tracker:
-            terminate_instance(ec2_config, tracker.instance_id)
-            EC2ChallengeTracker.query.filter_by(instance_id=tracker.instance_id).delete()
+        if tracker and not tracker.instance_id:
+            # Still provisioning, the background launch terminates it once the tracker is gone
+            record_end(tracker, solved=True)
+            EC2ChallengeTracker.query.filter_by(id=tracker.id).delete()
+        elif tracker:
+            EC2ChallengeTracker.query.filter_by(id=tracker.id).update(
+                {
+                    "status": "terminating",
+                    "revert_time": unix_time(datetime.utcnow()) + SOLVE_TERMINATE_RETRY_DELAY,
+                },
+                synchronize_session=False,
+            )
 
         db.session.commit()
 
+        if tracker and tracker.instance_id:
+            enqueue("terminate_solved", tracker.id)
+
     @staticmethod
     def fail(user, team, challenge, request):
         """
@@ -755,19 +2081,21 @@ instance_namespace = Namespace("instance", description="Endpoint to interact wit
 @instance_namespace.route("", methods=["POST", "GET"])
 class InstanceAPI(Resource):
     @authed_only
+    @tracing.traced
     def get(self):
         challenge_id = request.args.get("id")
-        challenge = EC2Challenge.query.filter_by(id=challenge_id).first()
+        challenge = get_challenge_params(challenge_id)
         if challenge is None:
             return abort(403)
         
-        ec2_config = EC2Config.query.filter_by(id=1).first()
+        ec2_config = get_ec2_config()
         session = get_current_user()
 
         # Check if user already has a running instance
         check = (
             EC2ChallengeTracker.query.filter_by(owner_id=session.id)
             .filter_by(challenge_id=challenge.id)
+            .filter(not_terminating())
             .first()
         )
 
@@ -777,17 +2105,20 @@ class InstanceAPI(Resource):
             current_time = unix_time(datetime.utcnow())
             if (current_time - check.timestamp) < 30:
                 return abort(403)
+
+            # Stop/start or hibernate strategies reuse the same instance
+            if reset_instance_in_place(challenge, check):
+                return {"success": True, "data": {"tracker_id": check.id}}
             
-            # Instance is old enough to reset - terminate it and delete the tracker
-            try:
-                terminate_instance(ec2_config, check.instance_id)
-                db.session.delete(check)
-                db.session.commit()
-            except Exception as e:
-                print(f"ERROR: Failed to terminate old instance during reset: {e}")
-                # Continue anyway to allow starting a new instance
-                db.session.delete(check)
-                db.session.commit()
+            # Instance is old enough to reset - delete the tracker and queue the
+            # termination. A tracker still provisioning has no instance yet; the
+            # background launch terminates it once it sees the tracker is gone.
+            record_end(check)
+            instance_id = check.instance_id
+            db.session.delete(check)
+            db.session.commit()
+            if instance_id:
+                enqueue("terminate_instances", [instance_id])
 
         flag = "".join(random.choices(string.ascii_uppercase + string.digits, k=16))
         success, result = create_instance_challenge(
@@ -797,11 +2128,90 @@ class InstanceAPI(Resource):
         )
 
         if success:
-            return {"success": True, "data": []}
+            return {"success": True, "data": result}
         else:
             return {"success": False, "data": result}
 
 
+@instance_namespace.route("/bulk", methods=["POST"])
+class BulkInstanceAPI(Resource):
+    """
+    Admin endpoint to pre-provision instances for a challenge ahead of an event.
+    The JSON body takes challenge_id and count.
+    """
+
+    @admins_only
+    def post(self):
+        data = request.get_json(silent=True) or request.form or {}
+
+        ec2_config = get_ec2_config()
+        if ec2_config is None or not ec2_config.region:
+            return {"success": False, "data": [], "error": "EC2 configuration not found"}
+
+        try:
+            challenge_id = int(data.get("challenge_id"))
+            count = int(data.get("count"))
+        except (TypeError, ValueError):
+            return {"success": False, "data": [], "error": "challenge_id and count are required"}
+
+        if not 1 <= count <= BULK_PROVISION_LIMIT:
+            return {"success": False, "data": [], "error": f"count must be between 1 and {BULK_PROVISION_LIMIT}"}
+
+        challenge = get_challenge_params(challenge_id)
+        if challenge is None:
+            return {"success": False, "data": [], "error": "Challenge not found"}
+
+        success, result = bulk_provision_instances(ec2_config, challenge, count)
+        if not success:
+            return {"success": False, "data": [], "error": result[0]}
+
+        return {
+            "success": True,
+            "data": {
+                "batch_id": result['batch_id'],
+                "requested": count,
+                "launched": len(result['trackers']),
+                "tracker_ids": [t.id for t in result['trackers']],
+            },
+        }
+
+
+@instance_namespace.route("/bulk_reset", methods=["POST"])
+class BulkResetAPI(Resource):
+    """
+    Admin endpoint to reset every running player instance of an SSM reset
+    challenge in place. The JSON body takes challenge_id. Progress is reported
+    per tracker by the instance status endpoint.
+    """
+
+    @admins_only
+    def post(self):
+        data = request.get_json(silent=True) or request.form or {}
+
+        ec2_config = get_ec2_config()
+        if ec2_config is None or not ec2_config.region:
+            return {"success": False, "data": [], "error": "EC2 configuration not found"}
+
+        try:
+            challenge_id = int(data.get("challenge_id"))
+        except (TypeError, ValueError):
+            return {"success": False, "data": [], "error": "challenge_id is required"}
+
+        challenge = get_challenge_params(challenge_id)
+        if challenge is None:
+            return {"success": False, "data": [], "error": "Challenge not found"}
+        if challenge.reset_strategy != "ssm":
+            return {"success": False, "data": [], "error": "Challenge does not use the SSM reset strategy"}
+        if not (challenge.reset_script or challenge.setup_script):
+            return {"success": False, "data": [], "error": "Challenge has no reset or setup script to run"}
+
+        tracker_ids = bulk_reset_instances(challenge)
+        return {
+            "success": True,
+            "data": {"resetting": len(tracker_ids), "tracker_ids": tracker_ids},
+        }
+
+
 instance_status_namespace = Namespace(
     "instance_status",
     description="Get the status of an EC2 instance.",
@@ -811,21 +2221,16 @@ instance_status_namespace = Namespace(
 @instance_status_namespace.route("", methods=["GET"])
 class InstanceStatus(Resource):
     @authed_only
+    @tracing.traced_tracker_request("id")
     def get(self):
-        ec2_config = EC2Config.query.filter_by(id=1).first()
+        metrics.STATUS_REQUESTS.inc("poll")
+        ec2_config = get_ec2_config()
         
         if not ec2_config:
             return {"success": False, "data": [], "error": "No EC2 configuration found"}
 
-        ec2_client = boto3.client(
-            "ec2",
-            ec2_config.region,
-            aws_access_key_id=ec2_config.aws_access_key_id,
-            aws_secret_access_key=ec2_config.aws_secret_access_key,
-            aws_session_token=os.environ.get("AWS_SESSION_TOKEN"),
-        )
-
         instance_id = request.args.get("instanceId")
+        tracker_id = request.args.get("id")
         
         # URL decode the instance ID if it's encoded
         if instance_id:
@@ -834,9 +2239,15 @@ class InstanceStatus(Resource):
 
         session = get_current_user()
 
-        challenge_tracker = EC2ChallengeTracker.query.filter_by(
-            instance_id=instance_id
-        ).first()
+        # Trackers that are still provisioning don't have an instance ID yet
+        if tracker_id:
+            challenge_tracker = EC2ChallengeTracker.query.filter_by(
+                id=tracker_id
+            ).first()
+        else:
+            challenge_tracker = EC2ChallengeTracker.query.filter_by(
+                instance_id=instance_id
+            ).first()
 
         if not challenge_tracker:
             print(f"DEBUG: No challenge tracker found for instanceId: {instance_id}")
@@ -863,57 +2274,148 @@ class InstanceStatus(Resource):
             else:
                 return {"success": False, "data": [], "error": "Owner mismatch"}
 
-        challenge = EC2Challenge.query.filter_by(
-            id=challenge_tracker.challenge_id
-        ).first()
+        if challenge_tracker.status == "failed":
+            return {
+                "success": False,
+                "data": {"running": False, "state": "failed"},
+                "error": challenge_tracker.error or "Instance failed to launch",
+            }
 
-        if not challenge:
-            return {"success": False, "data": [], "error": "Challenge not found"}
+        if not challenge_tracker.instance_id:
+            return {
+                "success": True,
+                "data": {"running": False, "state": "provisioning"},
+                "public_ip": "",
+            }
 
-        try:
-            # Get instance status
-            response = ec2_client.describe_instances(InstanceIds=[instance_id])
-            
-            if not response['Reservations']:
-                return {"success": False, "data": [], "error": "Instance not found"}
-            
-            instance = response['Reservations'][0]['Instances'][0]
-            state = instance['State']['Name']
-            public_ip = instance.get('PublicIpAddress', '')
-            
-            # Format the IP address with scheme and port if configured
-            formatted_ip = public_ip
-            if public_ip:
-                # Add scheme if configured
-                if challenge.scheme:
-                    formatted_ip = f"{challenge.scheme}://{public_ip}"
-                
-                # Add port if configured
-                if challenge.port:
-                    if challenge.scheme:
-                        # If scheme is present, add port after the IP
-                        formatted_ip = f"{challenge.scheme}://{public_ip}:{challenge.port}"
-                    else:
-                        # If no scheme, just add port
-                        formatted_ip = f"{public_ip}:{challenge.port}"
-            
-            # Update the host field in the tracker if we got an IP and it's different
-            if public_ip and challenge_tracker.host != formatted_ip:
-                print(f"DEBUG: Updating host field from '{challenge_tracker.host}' to '{formatted_ip}'")
-                challenge_tracker.host = formatted_ip
-                db.session.commit()
-            
-            is_running = state == 'running'
-            
+        if challenge_tracker.status == "resetting":
+            cached = get_instance_state(challenge_tracker.id) or {}
             return {
                 "success": True,
-                "data": {"running": is_running, "state": state},
-                "public_ip": formatted_ip,
+                "data": {"running": False, "state": "resetting", "reset_step": cached.get("reset_step")},
+                "public_ip": "",
             }
-            
-        except Exception as e:
-            print(f"DEBUG: Error getting instance status: {e}")
-            return {"success": False, "data": [], "error": str(e)}
+
+        # AWS is only ever asked by the background poller
+        cached = get_instance_state(challenge_tracker.id)
+        if cached is None:
+            wake_poller()
+            return {
+                "success": True,
+                "data": {"running": False, "state": "pending"},
+                "public_ip": "",
+            }
+
+        return {
+            "success": True,
+            "data": {"running": cached["state"] == "running", "state": cached["state"]},
+            "public_ip": cached["host"],
+        }
+
+
+@instance_status_namespace.route("/stream", methods=["GET"])
+class InstanceStatusStream(Resource):
+    """
+    Server-Sent Events stream of a tracker's state transitions:
+    pending, running, ip, failed and terminated.
+    """
+
+    @authed_only
+    def get(self):
+        metrics.STATUS_REQUESTS.inc("stream")
+        tracker_id = request.args.get("id")
+        session = get_current_user()
+
+        tracker = EC2ChallengeTracker.query.filter_by(id=tracker_id).first()
+        if tracker is None:
+            return {"success": False, "data": [], "error": "No challenge tracker found"}, 404
+        if str(tracker.owner_id) != str(session.id) and not is_admin():
+            return {"success": False, "data": [], "error": "Owner mismatch"}, 403
+
+        return Response(
+            stream_with_context(self._events(tracker.id)),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @staticmethod
+    def _current_event(tracker_id):
+        tracker = (
+            db.session.query(
+                EC2ChallengeTracker.status,
+                EC2ChallengeTracker.instance_id,
+                EC2ChallengeTracker.error,
+            )
+            .filter_by(id=tracker_id)
+            .first()
+        )
+        if tracker is None or tracker.status == "terminating":
+            return "terminated", {}
+        if tracker.status == "failed":
+            return "failed", {"error": tracker.error or "Instance failed to launch"}
+        if not tracker.instance_id:
+            return "pending", {"state": "provisioning"}
+        if tracker.status == "resetting":
+            cached = get_instance_state(tracker_id) or {}
+            return "pending", {"state": "resetting", "reset_step": cached.get("reset_step")}
+
+        cached = get_instance_state(tracker_id)
+        if cached is None:
+            wake_poller()
+            return "pending", {"state": "pending"}
+        return InstanceStatusStream._cached_event(cached)
+
+    @staticmethod
+    def _cached_event(cached):
+        # Built from the poller's cache alone, tracker status is as of its last pass
+        if cached.get("status") == "terminating":
+            return "terminated", {}
+        if cached.get("status") == "failed":
+            return "failed", {"error": cached.get("error") or "Instance failed to launch"}
+        if cached.get("reset_step"):
+            return "pending", {"state": "resetting", "reset_step": cached["reset_step"]}
+        if cached["state"] in ("shutting-down", "terminated"):
+            return "terminated", {"state": cached["state"]}
+        if cached["state"] == "running" and cached["host"]:
+            return "ip", {"state": cached["state"], "public_ip": cached["host"]}
+        if cached["state"] == "running":
+            return "running", {"state": cached["state"]}
+        return "pending", {"state": cached["state"]}
+
+    def _events(self, tracker_id):
+        # Reconnects are paced by the browser, STREAM_RETRY_MS after the stream ends
+        yield f"retry: {STREAM_RETRY_MS}\n\n"
+
+        # The only database read, the rest of the stream follows the poller's cache
+        event, data = self._current_event(tracker_id)
+        db.session.close()
+        yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+        # Sync workers would be held by an open stream, and until the poller has seen
+        # the instance there is nothing in the cache to follow, so end the stream and
+        # let the browser reconnect
+        if event in ("ip", "failed", "terminated") or not async_workers():
+            return
+        if get_instance_state(tracker_id) is None:
+            return
+
+        last = (event, data)
+        started = time.time()
+        while time.time() - started < STREAM_TIMEOUT:
+            time.sleep(1)
+            cached = get_instance_state(tracker_id)
+            if cached is None:
+                # Expired from the cache, pick up from the database on reconnect
+                return
+            event, data = self._cached_event(cached)
+            if (event, data) != last:
+                last = (event, data)
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+                if event in ("ip", "failed", "terminated"):
+                    return
+            else:
+                # Comment line, keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
 
 
 active_ec2_namespace = Namespace(
@@ -929,30 +2431,47 @@ class EC2Status(Resource):
     """
 
     @authed_only
+    @tracing.traced
     def get(self):
-        ec2_config = EC2Config.query.first()
-
         session = get_current_user()
-        tracker = EC2ChallengeTracker.query.filter_by(owner_id=session.id)
-        data = list()
-        for i in tracker:
-            challenge = EC2Challenge.query.filter_by(id=i.challenge_id).first()
 
-            # Skip if challenge doesn't exist (might have been deleted)
-            if challenge is None:
-                continue
-
-            data.append(
-                {
-                    "id": i.id,
-                    "owner_id": i.owner_id,
-                    "challenge_id": i.challenge_id,
-                    "timestamp": i.timestamp,
-                    "revert_time": i.revert_time,
-                    "instance_id": i.instance_id,
-                }
+        # Trackers for deleted challenges are dropped by the inner join
+        trackers = (
+            db.session.query(
+                EC2ChallengeTracker.id,
+                EC2ChallengeTracker.owner_id,
+                EC2ChallengeTracker.challenge_id,
+                EC2ChallengeTracker.timestamp,
+                EC2ChallengeTracker.revert_time,
+                EC2ChallengeTracker.instance_id,
+                EC2ChallengeTracker.status,
             )
-        return {"success": True, "data": data}
+            .join(EC2Challenge, EC2Challenge.id == EC2ChallengeTracker.challenge_id)
+            .filter(EC2ChallengeTracker.owner_id == session.id, not_terminating())
+            .order_by(EC2ChallengeTracker.id)
+            .all()
+        )
+
+        # The ETag only depends on the user's tracker rows, so a repeat poll
+        # with nothing new is answered before building the response body
+        etag = hashlib.sha1(repr([tuple(t) for t in trackers]).encode()).hexdigest()
+        headers = {"ETag": f'"{etag}"', "Cache-Control": "private, no-cache"}
+        if request.if_none_match.contains(etag):
+            return Response(status=304, headers=headers)
+
+        data = [
+            {
+                "id": t.id,
+                "owner_id": t.owner_id,
+                "challenge_id": t.challenge_id,
+                "timestamp": t.timestamp,
+                "revert_time": t.revert_time,
+                "instance_id": t.instance_id,
+                "status": t.status,
+            }
+            for t in trackers
+        ]
+        return {"success": True, "data": data}, 200, headers
 
 
 ec2_config_namespace = Namespace("ec2_config", description="Endpoint to manage EC2 configuration")
@@ -960,44 +2479,99 @@ ec2_config_namespace = Namespace("ec2_config", description="Endpoint to manage E
 
 @ec2_config_namespace.route("", methods=["GET"])
 class EC2ConfigAPI(Resource):
-    @authed_only
+    @admins_only
     def get(self):
-        ec2_config = EC2Config.query.filter_by(id=1).first()
+        ec2_config = get_ec2_config()
         
         if not ec2_config:
             return {"success": False, "data": {}, "error": "No EC2 configuration found"}
 
+        refresh = request.args.get("refresh", "").lower() in ["true", "1", "yes"]
+        listings = get_resource_listings(ec2_config, refresh=refresh)
+
         return {
             "success": True,
             "data": {
                 "subnets": [
                     {"value": subnet["id"], "name": subnet.get("name", subnet["id"])}
-                    for subnet in get_available_subnets(ec2_config)
+                    for subnet in listings["subnets"]
                 ],
                 "security_groups": [
                     {"value": sg["id"], "name": sg["name"]}
-                    for sg in get_available_security_groups(ec2_config)
+                    for sg in listings["security_groups"]
                 ],
                 "amis": [
                     {"value": ami["id"], "name": ami["name"]}
-                    for ami in get_available_amis(ec2_config)
+                    for ami in listings["amis"]
                     if not ami.get("error")  # Filter out error objects
-                ]
+                ],
+                # Full details for the admin configuration page
+                "available_amis": listings["amis"],
+                "available_subnets": listings["subnets"],
+                "fetched_at": listings["fetched_at"],
             }
         }
 
 
+@ec2_config_namespace.route("/search", methods=["GET"])
+class EC2ConfigSearchAPI(Resource):
+    """
+    Search-as-you-type for AMIs, subnets and security groups. Results are
+    streamed as newline delimited JSON while AWS pages are being read.
+    """
+
+    searches = {
+        "amis": (iter_available_amis, ("architecture",)),
+        "subnets": (iter_available_subnets, ("vpc_id",)),
+        "security_groups": (iter_available_security_groups, ("vpc_id",)),
+    }
+
+    @admins_only
+    def get(self):
+        ec2_config = get_ec2_config()
+        if not ec2_config:
+            return {"success": False, "data": [], "error": "No EC2 configuration found"}
+
+        kind = request.args.get("kind", "amis")
+        if kind not in self.searches:
+            return {"success": False, "data": [], "error": "Unknown resource kind"}, 400
+
+        search, extra_filters = self.searches[kind]
+        filters = {"name_prefix": request.args.get("q", "").strip() or None}
+        for name in extra_filters:
+            filters[name] = request.args.get(name) or None
+        limit = min(max(request.args.get("limit", 50, type=int), 1), 500)
+
+        def generate():
+            try:
+                for count, item in enumerate(search(ec2_config, **filters), start=1):
+                    yield json.dumps(item) + "\n"
+                    # Stop reading pages once the caller has enough
+                    if count >= limit:
+                        break
+            except Exception as e:
+                print(f"ERROR: Failed to search {kind}: {str(e)}")
+                yield json.dumps({"error": "api_error", "message": str(e)}) + "\n"
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype="application/x-ndjson",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+
 @ec2_config_namespace.route("/status", methods=["GET"])
 class EC2ConfigStatusAPI(Resource):
     @admins_only
     def get(self):
-        ec2_config = EC2Config.query.filter_by(id=1).first()
+        ec2_config = get_ec2_config()
         
         return {
             "success": True,
             "data": {
                 "config_valid": bool(ec2_config),
-                "has_credentials": bool(ec2_config and (ec2_config.aws_access_key_id or os.environ.get("AWS_ACCESS_KEY_ID")))
+                "has_credentials": bool(ec2_config and (ec2_config.has_credentials or os.environ.get("AWS_ACCESS_KEY_ID"))),
+                "api_governor": governor.stats()
             }
         }
 
@@ -1013,22 +2587,22 @@ class NukeAPI(Resource):
         """Terminate an EC2 instance (GET method)"""
         print(f"DEBUG: NukeAPI.get called with instance_id: {request.args.get('instance')}")
         instance_id = request.args.get("instance")
-        return self._terminate_instance(instance_id)
+        return self._terminate_instance(instance_id, request.args.get("id"))
     
     @authed_only
     def post(self):
         """Terminate an EC2 instance (POST method)"""
         print(f"DEBUG: NukeAPI.post called with instance_id: {request.args.get('instance')}")
         instance_id = request.args.get("instance")
-        return self._terminate_instance(instance_id)
+        return self._terminate_instance(instance_id, request.args.get("id"))
     
-    def _terminate_instance(self, instance_id):
+    def _terminate_instance(self, instance_id, tracker_id=None):
         """Common logic for terminating an instance"""
         print(f"DEBUG: _terminate_instance called with instance_id: {instance_id}")
-        if not instance_id:
+        if not instance_id and not tracker_id:
             return {"success": False, "data": [], "error": "Instance ID required"}
 
-        ec2_config = EC2Config.query.filter_by(id=1).first()
+        ec2_config = get_ec2_config()
         if ec2_config is None:
             return {"success": False, "data": [], "error": "EC2 configuration not found"}
 
@@ -1036,30 +2610,37 @@ class NukeAPI(Resource):
         print(f"DEBUG: Current user ID: {session.id}")
         
         # Check if user owns this instance
-        tracker = EC2ChallengeTracker.query.filter_by(
-            owner_id=session.id,
-            instance_id=instance_id
-        ).first()
+        if tracker_id:
+            tracker = EC2ChallengeTracker.query.filter_by(
+                owner_id=session.id,
+                id=tracker_id
+            ).first()
+        else:
+            tracker = EC2ChallengeTracker.query.filter_by(
+                owner_id=session.id,
+                instance_id=instance_id
+            ).first()
         
         print(f"DEBUG: Tracker found: {tracker is not None}")
         if tracker is None:
             return {"success": False, "data": [], "error": "Instance not found or not owned by user"}
 
-        try:
-            # Terminate the instance
-            success, result = terminate_instance(ec2_config, instance_id)
-            
-            if success:
-                # Remove from tracker
-                db.session.delete(tracker)
-                db.session.commit()
-                return {"success": True, "data": []}
-            else:
-                return {"success": False, "data": [], "error": result}
-                
-        except Exception as e:
-            print(f"ERROR: Failed to terminate instance {instance_id}: {e}")
-            return {"success": False, "data": [], "error": str(e)}
+        # Still provisioning, the background launch terminates the instance
+        # once it sees the tracker has been removed
+        if not tracker.instance_id:
+            record_end(tracker)
+            db.session.delete(tracker)
+            db.session.commit()
+            return {"success": True, "data": []}
+
+        instance_id = tracker.instance_id
+
+        # Remove from tracker, the instance is terminated by a queued job
+        record_end(tracker)
+        db.session.delete(tracker)
+        db.session.commit()
+        enqueue("terminate_instances", [instance_id])
+        return {"success": True, "data": []}
 
 
 # Add stop_instance namespace for admin interface
@@ -1085,26 +2666,249 @@ class StopInstanceAPI(Resource):
         if not instance_id:
             return {"success": False, "data": [], "error": "Instance ID required"}
 
-        ec2_config = EC2Config.query.filter_by(id=1).first()
+        ec2_config = get_ec2_config()
+        if ec2_config is None:
+            return {"success": False, "data": [], "error": "EC2 configuration not found"}
+
+        # Remove from tracker, the instance is terminated by a queued job
+        tracker = EC2ChallengeTracker.query.filter_by(instance_id=instance_id).first()
+        if tracker:
+            record_end(tracker)
+            db.session.delete(tracker)
+            db.session.commit()
+        enqueue("terminate_instances", [instance_id])
+        return {"success": True, "data": []}
+
+
+@stop_instance_namespace.route("/bulk", methods=["POST"])
+class BulkStopInstanceAPI(Resource):
+    """
+    Admin endpoint to terminate every instance matching a filter in a few
+    batched AWS calls. The JSON body takes any combination of:
+
+    - all: true to match every player instance
+    - challenge_id: instances for one challenge
+    - owner_id: instances owned by one user
+    - older_than: instances started before this unix timestamp
+    - include_pool: also match unassigned warm pool instances
+    """
+
+    @admins_only
+    def post(self):
+        data = request.get_json(silent=True) or request.form or {}
+
+        ec2_config = get_ec2_config()
         if ec2_config is None:
             return {"success": False, "data": [], "error": "EC2 configuration not found"}
 
+        query = db.session.query(
+            EC2ChallengeTracker.id,
+            EC2ChallengeTracker.instance_id,
+            EC2ChallengeTracker.owner_id,
+            EC2ChallengeTracker.challenge_id,
+            EC2ChallengeTracker.timestamp,
+            EC2ChallengeTracker.status,
+        )
+        has_filter = str(data.get("all", "")).lower() in ["true", "1", "yes"]
+
         try:
-            # Terminate the instance
-            success, result = terminate_instance(ec2_config, instance_id)
-            
-            if success:
-                # Remove from tracker
-                tracker = EC2ChallengeTracker.query.filter_by(instance_id=instance_id).first()
-                if tracker:
-                    db.session.delete(tracker)
-                    db.session.commit()
-                return {"success": True, "data": []}
-            else:
-                return {"success": False, "data": [], "error": result}
-                
-        except Exception as e:
-            print(f"ERROR: Failed to terminate instance {instance_id}: {e}")
-            return {"success": False, "data": [], "error": str(e)}
+            if data.get("challenge_id"):
+                query = query.filter(EC2ChallengeTracker.challenge_id == int(data["challenge_id"]))
+                has_filter = True
+            if data.get("owner_id"):
+                query = query.filter(EC2ChallengeTracker.owner_id == str(data["owner_id"]))
+                has_filter = True
+            if data.get("older_than"):
+                query = query.filter(EC2ChallengeTracker.timestamp < int(data["older_than"]))
+                has_filter = True
+        except (TypeError, ValueError):
+            return {"success": False, "data": [], "error": "Invalid filter value"}
+
+        if not has_filter:
+            return {"success": False, "data": [], "error": "A filter or all=true is required"}
+
+        if str(data.get("include_pool", "")).lower() not in ["true", "1", "yes"]:
+            query = query.filter(EC2ChallengeTracker.owner_id.isnot(None))
+
+        trackers = query.all()
+        removed = release_trackers(trackers)
+
+        return {
+            "success": True,
+            "data": {"matched": len(trackers), "terminated": len(removed)},
+            "error": [],
+        }
+
+
+# Prometheus metrics
+metrics_namespace = Namespace("ec2_metrics", description="Prometheus metrics for the EC2 plugin")
+
+
+@metrics_namespace.route("", methods=["GET"])
+class MetricsAPI(Resource):
+    def get(self):
+        # Admin session, or the scrape token when one is configured
+        token = request.headers.get("Authorization", "")
+        if not (
+            (METRICS_TOKEN and hmac.compare_digest(token, f"Bearer {METRICS_TOKEN}"))
+            or is_admin()
+        ):
+            return abort(403)
+
+        # Gauges are computed per scrape so nothing is maintained on the hot paths
+        assigned = EC2ChallengeTracker.owner_id.isnot(None)
+        active = (
+            db.session.query(EC2ChallengeTracker.challenge_id, assigned, db.func.count(EC2ChallengeTracker.id))
+            .group_by(EC2ChallengeTracker.challenge_id, assigned)
+            .all()
+        )
+        stats = governor.stats()
+        jobs = (
+            db.session.query(EC2Job.kind, EC2Job.status, db.func.count(EC2Job.id))
+            .group_by(EC2Job.kind, EC2Job.status)
+            .all()
+        )
+
+        body = metrics.render(
+            metrics.gauge(
+                "ec2_active_trackers",
+                "Tracked instances per challenge, assigned to a player or waiting in a pool",
+                (((challenge_id, "true" if is_assigned else "false"), count) for challenge_id, is_assigned, count in active),
+                ["challenge_id", "assigned"],
+            ),
+            metrics.gauge(
+                "ec2_aws_queue_depth",
+                "Calls waiting on the client-side rate limiter in this process",
+                (((action,), s["queue_depth"]) for action, s in stats.items()),
+                ["action"],
+            ),
+            metrics.gauge(
+                "ec2_aws_rate_limit",
+                "Current client-side rate limit in calls per second",
+                (((action,), s["rate"]) for action, s in stats.items()),
+                ["action"],
+            ),
+            metrics.gauge(
+                "ec2_job_queue_depth",
+                "Background jobs in the queue by kind and status (queued, running or dead)",
+                (((kind, status), count) for kind, status, count in jobs),
+                ["kind", "status"],
+            ),
+        )
+        return Response(body, mimetype="text/plain; version=0.0.4")
+
+
+# Instance history analytics
+history_namespace = Namespace("ec2_history", description="Endpoint for admins to analyse EC2 instance usage")
+
+
+def _percentile(ordered, p):
+    if not ordered:
+        return None
+    return ordered[max(-(-p * len(ordered) // 100) - 1, 0)]
+
+
+@history_namespace.route("/stats", methods=["GET"])
+class HistoryStatsAPI(Resource):
+    """
+    Per-challenge launches, instance-hours, solves and solve-time percentiles
+    (seconds from getting an instance to solving with it). Optional since and
+    until unix timestamps and challenge_id narrow it down.
+    """
+
+    @admins_only
+    def get(self):
+        filters = []
+        try:
+            if request.args.get("since"):
+                filters.append(EC2History.start_time >= int(request.args["since"]))
+            if request.args.get("until"):
+                filters.append(EC2History.start_time < int(request.args["until"]))
+            if request.args.get("challenge_id"):
+                filters.append(EC2History.challenge_id == int(request.args["challenge_id"]))
+        except ValueError:
+            return {"success": False, "data": [], "error": "Invalid filter value"}, 400
+
+        duration = EC2History.end_time - EC2History.start_time
+        totals = (
+            db.session.query(
+                EC2History.challenge_id,
+                db.func.count(EC2History.id),
+                db.func.sum(db.case((EC2History.end_time.is_(None), 1), else_=0)),
+                db.func.sum(db.case((EC2History.solved.is_(True), 1), else_=0)),
+                db.func.sum(duration),
+            )
+            .filter(*filters)
+            .group_by(EC2History.challenge_id)
+            .all()
+        )
+
+        solve_times = {}
+        for challenge_id, seconds in (
+            db.session.query(EC2History.challenge_id, duration)
+            .filter(*filters, EC2History.solved.is_(True), EC2History.end_time.isnot(None))
+            .order_by(EC2History.challenge_id, duration)
+        ):
+            solve_times.setdefault(challenge_id, []).append(seconds)
+
+        names = dict(
+            db.session.query(Challenges.id, Challenges.name).filter(
+                Challenges.id.in_([row[0] for row in totals])
+            )
+        )
+
+        data = []
+        for challenge_id, launches, running, solves, seconds in totals:
+            times = solve_times.get(challenge_id, [])
+            data.append({
+                "challenge_id": challenge_id,
+                "name": names.get(challenge_id),
+                "launches": launches,
+                "running": int(running or 0),
+                "solves": int(solves or 0),
+                "instance_hours": round((seconds or 0) / 3600, 2),
+                "solve_time": {
+                    "p50": _percentile(times, 50),
+                    "p90": _percentile(times, 90),
+                    "p99": _percentile(times, 99),
+                },
+            })
+
+        return {"success": True, "data": data}
+
+
+# Background job queue
+jobs_namespace = Namespace("ec2_jobs", description="Endpoint for admins to monitor the EC2 job queue")
 
 
+@jobs_namespace.route("", methods=["GET"])
+class JobQueueAPI(Resource):
+    """
+    Queue depth by job kind and status, the wait of the oldest due job and the
+    latest dead-lettered jobs
+    """
+
+    @admins_only
+    def get(self):
+        return {"success": True, "data": queue_stats()}
+
+
+@jobs_namespace.route("/retry", methods=["POST"])
+class JobRetryAPI(Resource):
+    """
+    Queue dead-lettered jobs again. The JSON body takes a job id, or all=true.
+    """
+
+    @admins_only
+    def post(self):
+        data = request.get_json(silent=True) or request.form or {}
+
+        if str(data.get("all", "")).lower() in ["true", "1", "yes"]:
+            job_id = None
+        else:
+            try:
+                job_id = int(data.get("id"))
+            except (TypeError, ValueError):
+                return {"success": False, "data": [], "error": "A job id or all=true is required"}
+
+        return {"success": True, "data": {"retried": retry_dead_jobs(job_id)}}
@@ -38,12 +38,17 @@ CTFd._internal.challenge.submit = function (preview) {
 function get_ec2_status(challenge) {
     fetch("/api/v1/ec2").then(result => result.json()).then(result => {
         if (!result['data'].some((item, i) => {
+            if (item.challenge_id == challenge && window.EventSource) {
+                // Let the server push state changes instead of polling
+                follow_instance(item.challenge_id, item.id);
+                return true;
+            }
             if (item.challenge_id == challenge) {
-                document.querySelector('#ec2_container').innerHTML = `<div class="mt-2" id="${String(item.instance_id).replaceAll(":", "_").replaceAll("/", "_")}_revert_container"></div><div class="mt-2" id="${String(item.instance_id).replaceAll(":", "_").replaceAll("/", "_")}_connect_to_container"></div>`;
+                document.querySelector('#ec2_container').innerHTML = `<div class="mt-2" id="tracker_${item.id}_revert_container"></div><div class="mt-2" id="tracker_${item.id}_connect_to_container"></div>`;
                 let running = false;
 
-                let revert_section = document.querySelector("#" + String(item.instance_id).replaceAll(":", "_").replaceAll("/", "_") + "_revert_container");
-                let connect_section = document.querySelector("#" + String(item.instance_id).replaceAll(":", "_").replaceAll("/", "_") + "_connect_to_container");
+                let revert_section = document.querySelector(`#tracker_${item.id}_revert_container`);
+                let connect_section = document.querySelector(`#tracker_${item.id}_connect_to_container`);
 
                 let initSecond = Math.floor(new Date().getTime() / 1000);
 
@@ -62,7 +67,12 @@ function get_ec2_status(challenge) {
                     ]
 
                     if (!running) {
-                        fetch(`/api/v1/instance_status?${new URLSearchParams({ instanceId: item.instance_id })}`).then(result => result.json()).then(result => {
+                        fetch(`/api/v1/instance_status?${new URLSearchParams({ id: item.id })}`).then(result => result.json()).then(result => {
+                            if (!result['success'] && result['data']['state'] === 'failed') {
+                                clearInterval(status_check_interval);
+                                connect_section.innerHTML = `<span class="text-danger">Failed to start challenge: ${result['error']}</span>`;
+                                revert_section.innerHTML = `<a onclick="start_instance('${item.challenge_id}');" class='btn btn-danger'><small style='color:white;'><i style='margin-right: 5px;' class="fas fa-redo"></i>Reset Challenge</small></a>`;
+                            }
                             if (result['success']) {
                                 if (result['data']['running']) {
                                     running = true;
@@ -81,15 +91,19 @@ function get_ec2_status(challenge) {
             };
         })) {
             // No existing challenge, inject the start button
-            document.querySelector('#ec2_container').innerHTML = `<span>
-                <a onclick="start_instance('${CTFd.lib.$('#challenge-id').val()}');" class='btn btn-success'>
-                    <small style='color:white;'><i style='margin-right: 5px;' class="fas fa-play"></i>Start Challenge</small>
-                </a>
-            </span>`
+            show_start_button();
         }
     });
 };
 
+function show_start_button() {
+    document.querySelector('#ec2_container').innerHTML = `<span>
+        <a onclick="start_instance('${CTFd.lib.$('#challenge-id').val()}');" class='btn btn-success'>
+            <small style='color:white;'><i style='margin-right: 5px;' class="fas fa-play"></i>Start Challenge</small>
+        </a>
+    </span>`
+}
+
 function start_instance(challenge) {
     running = false;
     
@@ -112,7 +126,7 @@ function start_instance(challenge) {
         if (!result.success) {
             if (result.data[0].indexOf("running") > 0) {
                 ezq({ title: "Challenge already running", body: `You already have a challenge already running (${result.data[1]})<br><br>Would you like to stop that challenge and start this one?` }).then(() => {
-                    stop_instance(result.data[2], result.data[3], false);
+                    stop_instance(result.data[2], result.data[3], false, result.data[4]);
                     setTimeout(() => {
                         start_instance(challenge);
                     }, 250);
@@ -120,6 +134,9 @@ function start_instance(challenge) {
             } else {
                 ezal({ title: "Failed to start challenge", body: result.data[0], button: "Dismiss" });
             }
+        } else if (window.EventSource && result.data.tracker_id) {
+            // Instance started successfully, follow it until it has an IP
+            follow_instance(challenge, result.data.tracker_id);
         } else {
             // Instance started successfully, now wait for IP
             wait_for_ip_and_show_status(challenge);
@@ -131,10 +148,97 @@ function start_instance(challenge) {
     });
 }
 
+var ec2_event_source = null;
+
+function follow_instance(challenge, tracker_id) {
+    // Only one stream per player, drop the one from a previous modal
+    if (ec2_event_source) {
+        ec2_event_source.close();
+    }
+    const source = new EventSource(`/api/v1/instance_status/stream?${new URLSearchParams({ id: tracker_id })}`);
+    ec2_event_source = source;
+
+    const statusMessages = [
+        'Provisioning VM challenge...',
+        'Doing stuff and things...',
+        'Injecting stuff...',
+        'Downloading viruses to your computer...',
+        'Almost ready...',
+        'Need coffee...',
+        'Killing time...',
+        'Killing in the name of...'
+    ];
+    let ticks = 0;
+    let headline = 'Your instance is starting, this shouldn\'t take longer than a minute and a half';
+
+    const render_waiting = () => {
+        const container = document.querySelector('#ec2_container');
+        if (!container) {
+            // The challenge modal was closed
+            stop();
+            return;
+        }
+        container.innerHTML = `<div class="text-center"><i class="fas fa-circle-notch fa-spin fa-1x"></i><br><small>${headline}</small><br><small>${statusMessages[Math.floor(ticks / 3) % statusMessages.length]}</small></div>`;
+    };
+    // Only rotates the message locally, no requests are made
+    const ticker = setInterval(() => {
+        ticks++;
+        render_waiting();
+    }, 1000);
+
+    const stop = () => {
+        clearInterval(ticker);
+        source.close();
+        if (ec2_event_source === source) {
+            ec2_event_source = null;
+        }
+    };
+
+    source.addEventListener('pending', event => {
+        const data = JSON.parse(event.data);
+        if (data.state === 'resetting') {
+            headline = `Resetting your instance: ${data.reset_step || 'requesting the reset'}`;
+        } else {
+            headline = 'Your instance is starting, this shouldn\'t take longer than a minute and a half';
+        }
+        render_waiting();
+    });
+    source.addEventListener('running', () => {
+        headline = 'Your instance is running, waiting for its IP address';
+        render_waiting();
+    });
+    source.addEventListener('ip', event => {
+        stop();
+        const data = JSON.parse(event.data);
+        show_final_status(challenge, { id: tracker_id }, data.public_ip);
+    });
+    source.addEventListener('failed', event => {
+        stop();
+        const data = JSON.parse(event.data);
+        document.querySelector('#ec2_container').innerHTML =
+            `<div class="text-center text-danger"><i class="fas fa-exclamation-triangle"></i><br><small>Failed to start challenge: ${data.error}</small></div>` +
+            `<div class="mt-2"><a onclick="start_instance('${challenge}');" class='btn btn-danger'><small style='color:white;'><i style='margin-right: 5px;' class="fas fa-redo"></i>Reset Challenge</small></a></div>`;
+    });
+    source.addEventListener('terminated', () => {
+        stop();
+        show_start_button();
+    });
+    source.onerror = () => {
+        // EventSource reconnects by itself unless the server refused the stream
+        if (source.readyState === EventSource.CLOSED) {
+            stop();
+            wait_for_ip_and_show_status(challenge);
+        }
+    };
+
+    render_waiting();
+}
+
 function wait_for_ip_and_show_status(challenge) {
     let attempts = 0;
-    const maxAttempts = 60; // 60 seconds timeout
+    const maxAttempts = 180; // 3 minutes timeout, launches now run in the background
     const checkInterval = 1000; // Check every second
+    let resetStep = null; // Set while an in-place reset is in progress
     
     const checkForIP = () => {
         attempts++;
@@ -151,8 +255,9 @@ function wait_for_ip_and_show_status(challenge) {
             'Killing in the name of...'
         ];
         const messageIndex = Math.min(Math.floor(attempts / 3), statusMessages.length - 1);
+        const message = resetStep ? `Resetting your instance: ${resetStep}` : statusMessages[messageIndex];
         document.querySelector('#ec2_container').innerHTML = 
-            `<div class="text-center"><i class="fas fa-circle-notch fa-spin fa-1x"></i><br><small>${statusMessages[messageIndex]}</small></div>`;
+            `<div class="text-center"><i class="fas fa-circle-notch fa-spin fa-1x"></i><br><small>${message}</small></div>`;
         
         // Check if instance is running and get status
         fetch("/api/v1/ec2").then(result => result.json()).then(result => {
@@ -160,10 +265,19 @@ function wait_for_ip_and_show_status(challenge) {
             
             if (taskItem) {
                 // Instance exists, check its status
-                fetch(`/api/v1/instance_status?${new URLSearchParams({ instanceId: taskItem.instance_id })}`)
+                fetch(`/api/v1/instance_status?${new URLSearchParams({ id: taskItem.id })}`)
                     .then(result => result.json())
                     .then(statusResult => {
+                        if (!statusResult['success'] && statusResult['data']['state'] === 'failed') {
+                            // The background launch failed, no point in waiting
+                            document.querySelector('#ec2_container').innerHTML = 
+                                `<div class="text-center text-danger"><i class="fas fa-exclamation-triangle"></i><br><small>Failed to start challenge: ${statusResult['error']}</small></div>`;
+                            return;
+                        }
                         if (statusResult['success']) {
+                            resetStep = statusResult['data']['state'] === 'resetting'
+                                ? (statusResult['data']['reset_step'] || 'requesting the reset')
+                                : null;
                             if (statusResult['data']['running']) {
                                 // Instance is running, check if we have an IP
                                 if (statusResult['public_ip'] && statusResult['public_ip'].trim() !== '') {
@@ -220,7 +334,7 @@ function wait_for_ip_and_show_status(challenge) {
 
 function show_final_status(challenge, taskItem, publicIP) {
     // Create the final status display
-    const containerId = String(taskItem.instance_id).replaceAll(":", "_").replaceAll("/", "_");
+    const containerId = `tracker_${taskItem.id}`;
     document.querySelector('#ec2_container').innerHTML = 
         `<div class="mt-2" id="${containerId}_revert_container"></div><div class="mt-2" id="${containerId}_connect_to_container"></div>`;
     
@@ -232,11 +346,13 @@ function show_final_status(challenge, taskItem, publicIP) {
     revert_section.innerHTML = `<a onclick="start_instance('${challenge}');" class='btn btn-danger'><small style='color:white;'><i style='margin-right: 5px;' class="fas fa-redo"></i>Reset Challenge</small></a>`;
 }
 
-function stop_instance(challenge, instance_id, refresh = true) {
+function stop_instance(challenge, instance_id, refresh = true, tracker_id = null) {
     console.log('DEBUG: stop_instance called with challenge:', challenge, 'instance_id:', instance_id);
     running = false;
     document.querySelector('#ec2_container').innerHTML = '<div class="text-center"><i class="fas fa-circle-notch fa-spin fa-1x"></i></div>';
-    const url = `/api/v1/ec2_nuke?${new URLSearchParams({ 'instance': instance_id })}`;
+    // Instances that are still provisioning only have a tracker ID
+    const params = tracker_id ? { 'id': tracker_id } : { 'instance': instance_id };
+    const url = `/api/v1/ec2_nuke?${new URLSearchParams(params)}`;
     console.log('DEBUG: Calling endpoint:', url);
     fetch(url, {
         method: 'POST',
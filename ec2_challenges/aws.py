@@ -0,0 +1,274 @@
+import json
+import os
+import threading
+import time
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+
+from . import metrics
+from .models import EC2Config
+
+
+# Upper bound on concurrent HTTP connections kept open per client
+MAX_POOL_CONNECTIONS = int(os.environ.get("AWS_MAX_POOL_CONNECTIONS", 50))
+
+# Retries for throttled and transient errors happen inside botocore
+MAX_ATTEMPTS = int(os.environ.get("AWS_MAX_ATTEMPTS", 8))
+
+# (burst, refill per second) per API action, modelled on EC2's request token buckets
+DEFAULT_RATE_LIMIT = (50, 5.0)
+DESCRIBE_RATE_LIMIT = (100, 20.0)
+RATE_LIMITS = {
+    "ec2:RunInstances": (5, 2.0),
+    "ec2:StartInstances": (5, 2.0),
+    "ec2:StopInstances": (5, 2.0),
+    "ec2:TerminateInstances": (50, 5.0),
+}
+# Extra limits as JSON, e.g. {"ec2:RunInstances": [10, 4]}
+RATE_LIMITS.update(
+    {k: tuple(v) for k, v in json.loads(os.environ.get("AWS_API_RATE_LIMITS", "{}")).items()}
+)
+
+THROTTLE_ERROR_CODES = {
+    "RequestLimitExceeded",
+    "Throttling",
+    "ThrottlingException",
+    "TooManyRequestsException",
+}
+
+# Errors a queued job retries later instead of failing the tracker straight away
+RETRYABLE_ERROR_CODES = THROTTLE_ERROR_CODES | {
+    "InsufficientInstanceCapacity",
+    "InternalError",
+    "ServiceUnavailable",
+    "Unavailable",
+}
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+class TokenBucket:
+    """
+    Token bucket whose refill rate halves when AWS throttles us and creeps back
+    up towards its configured rate as calls succeed again.
+    """
+
+    def __init__(self, burst, rate):
+        self.burst = burst
+        self.max_rate = rate
+        self.rate = rate
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.waiting = 0
+        self.throttled_count = 0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        with self.lock:
+            self.waiting += 1
+        try:
+            while True:
+                with self.lock:
+                    self._refill(time.monotonic())
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    delay = (1 - self.tokens) / self.rate
+                time.sleep(delay)
+        finally:
+            with self.lock:
+                self.waiting -= 1
+
+    def throttled(self):
+        with self.lock:
+            self.throttled_count += 1
+            self.rate = max(self.rate / 2, self.max_rate / 16)
+            # Drain the bucket so queued callers back off straight away
+            self.tokens = min(self.tokens, 0.0)
+
+    def succeeded(self):
+        if self.rate >= self.max_rate:
+            return
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class RateGovernor:
+    """
+    Process wide client-side rate limiting for every AWS call made through the
+    shared clients, with one token bucket per API action.
+    """
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, action):
+        bucket = self._buckets.get(action)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(action)
+                if bucket is None:
+                    operation = action.split(":", 1)[-1]
+                    if action in RATE_LIMITS:
+                        burst, rate = RATE_LIMITS[action]
+                    elif operation.startswith("Describe") or operation.startswith("List") or operation.startswith("Get"):
+                        burst, rate = DESCRIBE_RATE_LIMIT
+                    else:
+                        burst, rate = DEFAULT_RATE_LIMIT
+                    bucket = TokenBucket(burst, rate)
+                    self._buckets[action] = bucket
+        return bucket
+
+    def before_send(self, event_name, **kwargs):
+        # Runs before every attempt, including botocore's own retries.
+        # Must return None, a return value would replace the HTTP response.
+        self.bucket(_action(event_name)).acquire()
+
+    def needs_retry(self, event_name, response=None, **kwargs):
+        # Must return None, a return value would be used as the retry delay
+        if response is None:
+            return
+        code = response[1].get("Error", {}).get("Code")
+        bucket = self.bucket(_action(event_name))
+        if code in THROTTLE_ERROR_CODES:
+            bucket.throttled()
+        elif code is None:
+            bucket.succeeded()
+
+    def stats(self):
+        """
+        Current rate, queue depth and throttle count per API action
+        """
+        return {
+            action: {
+                "rate": round(bucket.rate, 2),
+                "max_rate": bucket.max_rate,
+                "queue_depth": bucket.waiting,
+                "throttled": bucket.throttled_count,
+            }
+            for action, bucket in sorted(self._buckets.items())
+        }
+
+
+governor = RateGovernor()
+
+
+def _action(event_name):
+    # e.g. before-send.ec2.RunInstances -> ec2:RunInstances
+    _, service, operation = event_name.split(".", 2)
+    return f"{service}:{operation}"
+
+
+def _before_call(event_name, context=None, **kwargs):
+    # Must return None, a return value would short-circuit the call
+    if context is not None:
+        context["ec2_call_started"] = time.monotonic()
+
+
+def _after_call(event_name, parsed=None, context=None, error_code=None, **kwargs):
+    action = _action(event_name)
+    metrics.AWS_CALLS.inc(action)
+    if error_code is None and parsed:
+        error_code = parsed.get("Error", {}).get("Code")
+    if error_code:
+        metrics.AWS_ERRORS.inc(action, error_code)
+    started = (context or {}).get("ec2_call_started")
+    if started is not None:
+        metrics.AWS_CALL_SECONDS.observe(time.monotonic() - started, action)
+
+
+def _after_call_error(event_name, exception=None, context=None, **kwargs):
+    # Connection failures and the like, which never produce a parsed response
+    _after_call(event_name, context=context, error_code=type(exception).__name__)
+
+
+def is_retryable(error):
+    """
+    Whether a failed AWS call is worth trying again later: capacity, throttling,
+    AWS side and connection errors
+    """
+    if isinstance(error, ClientError):
+        return error.response.get("Error", {}).get("Code") in RETRYABLE_ERROR_CODES
+    return isinstance(error, BotoCoreError)
+
+
+def _client_key(ec2_config, service_name):
+    return (
+        service_name,
+        ec2_config.region,
+        ec2_config.credentials_digest,
+        os.environ.get("AWS_SESSION_TOKEN"),
+    )
+
+
+def _load_credentials():
+    # Read when a client is built so the secret never sits in the shared cache
+    ec2 = EC2Config.query.filter_by(id=1).first()
+    if ec2 is None:
+        return None, None
+    return ec2.aws_access_key_id, ec2.aws_secret_access_key
+
+
+def get_client(ec2_config, service_name="ec2"):
+    """
+    Get a shared boto3 client for the configured region and credentials.
+
+    Clients are thread-safe once built, so one client (and its connection pool)
+    is reused by every request and background thread in this process. A change
+    of region or credentials produces a new key and therefore a new client.
+    Building a client reads the credentials from the database, so it needs an
+    application context.
+    """
+    key = _client_key(ec2_config, service_name)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            access_key_id, secret_access_key = _load_credentials()
+            # Sessions are not thread-safe, so each client gets its own
+            session = boto3.session.Session(
+                aws_access_key_id=access_key_id,
+                aws_secret_access_key=secret_access_key,
+                aws_session_token=os.environ.get("AWS_SESSION_TOKEN"),
+                region_name=ec2_config.region,
+            )
+            client = session.client(
+                service_name,
+                config=Config(
+                    max_pool_connections=MAX_POOL_CONNECTIONS,
+                    retries={"max_attempts": MAX_ATTEMPTS, "mode": "standard"},
+                ),
+            )
+            client.meta.events.register(f"before-send.{service_name}", governor.before_send)
+            client.meta.events.register(f"needs-retry.{service_name}", governor.needs_retry)
+            client.meta.events.register(f"before-call.{service_name}", _before_call)
+            client.meta.events.register(f"after-call.{service_name}", _after_call)
+            client.meta.events.register(f"after-call-error.{service_name}", _after_call_error)
+            _clients[key] = client
+    return client
+
+
+def get_ec2_client(ec2_config):
+    """
+    Get the shared EC2 client for the given configuration
+    """
+    return get_client(ec2_config, "ec2")
+
+
+def reset_clients():
+    """
+    Drop every cached client so the next call rebuilds it from fresh settings
+    """
+    with _clients_lock:
+        _clients.clear()
@@ -0,0 +1,147 @@
+import hashlib
+from types import SimpleNamespace
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from CTFd.cache import cache
+from CTFd.models import db, Flags
+
+from .models import EC2Config, EC2Challenge
+
+
+# Upper bound on how stale a cached value can be if an invalidation is missed
+CACHE_TIMEOUT = 300
+
+# Credentials stay out of the shared cache, aws.get_client reads them from the database
+CONFIG_FIELDS = (
+    "id",
+    "region",
+    "default_instance_type",
+    "default_security_group",
+    "default_key_name",
+    "max_instance_time",
+    "auto_stop_enabled",
+)
+
+CHALLENGE_FIELDS = (
+    "id",
+    "name",
+    "state",
+    "ami_id",
+    "instance_type",
+    "security_group",
+    "key_name",
+    "subnet_id",
+    "setup_script",
+    "reset_script",
+    "scheme",
+    "port",
+    "auto_stop_time",
+    "warm_pool_size",
+    "reset_strategy",
+)
+
+
+@cache.memoize(timeout=CACHE_TIMEOUT)
+def _get_ec2_config_values():
+    ec2 = EC2Config.query.filter_by(id=1).first()
+    if ec2 is None:
+        return None
+    values = {field: getattr(ec2, field) for field in CONFIG_FIELDS}
+    # Lets every process notice new credentials without caching them
+    values["credentials_digest"] = hashlib.sha256(
+        f"{ec2.aws_access_key_id}:{ec2.aws_secret_access_key}".encode()
+    ).hexdigest()
+    values["has_credentials"] = bool(ec2.aws_access_key_id)
+    return values
+
+
+def get_ec2_config():
+    """
+    Get a read-only snapshot of the EC2 configuration, or None if there is none.
+    Use EC2Config directly when the configuration needs to be changed.
+    """
+    values = _get_ec2_config_values()
+    return SimpleNamespace(**values) if values else None
+
+
+def clear_ec2_config():
+    cache.delete_memoized(_get_ec2_config_values)
+
+
+@cache.memoize(timeout=CACHE_TIMEOUT)
+def _get_challenge_values(challenge_id):
+    challenge = EC2Challenge.query.filter_by(id=challenge_id).first()
+    if challenge is None:
+        return None
+    return {field: getattr(challenge, field) for field in CHALLENGE_FIELDS}
+
+
+def get_challenge_params(challenge_id):
+    """
+    Get a read-only snapshot of an EC2 challenge's launch parameters, or None
+    if the challenge doesn't exist
+    """
+    try:
+        challenge_id = int(challenge_id)
+    except (TypeError, ValueError):
+        return None
+    values = _get_challenge_values(challenge_id)
+    return SimpleNamespace(**values) if values else None
+
+
+def clear_challenge_params(challenge_id):
+    cache.delete_memoized(_get_challenge_values, int(challenge_id))
+
+
+def flag_digest(content):
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+@cache.memoize(timeout=CACHE_TIMEOUT)
+def _get_flag_digests(challenge_id):
+    # Only digests are cached so flags never sit in the cache in plain text
+    return {
+        flag_digest(content)
+        for (content,) in db.session.query(Flags.content).filter_by(challenge_id=challenge_id)
+        if content
+    }
+
+
+def is_challenge_flag(challenge_id, submission):
+    """
+    Check a submission against a challenge's flags with one cached set lookup
+    """
+    return flag_digest(submission) in _get_flag_digests(int(challenge_id))
+
+
+def clear_challenge_flags(challenge_id):
+    cache.delete_memoized(_get_flag_digests, int(challenge_id))
+
+
+def _flag_changed(mapper, connection, target):
+    # Cleared once the change is committed, clearing now would let a concurrent
+    # attempt cache the old flags again before the commit
+    pending = inspect(target).session.info.setdefault("ec2_changed_flag_challenges", set())
+    pending.add(target.challenge_id)
+    # A flag moved to another challenge leaves the old one stale too
+    for old_challenge_id in inspect(target).attrs.challenge_id.history.deleted:
+        if old_challenge_id is not None:
+            pending.add(old_challenge_id)
+
+
+def _clear_changed_flags(session):
+    for challenge_id in session.info.pop("ec2_changed_flag_challenges", ()):
+        if challenge_id is not None:
+            clear_challenge_flags(challenge_id)
+
+
+def _forget_changed_flags(session):
+    session.info.pop("ec2_changed_flag_challenges", None)
+
+
+for _event in ("after_insert", "after_update", "after_delete"):
+    event.listen(Flags, _event, _flag_changed)
+event.listen(Session, "after_commit", _clear_changed_flags)
+event.listen(Session, "after_rollback", _forget_changed_flags)
@@ -0,0 +1,152 @@
+"""
+Buffered writer for EC2History.
+
+Request handlers only append lifecycle events to an in-process buffer, and a
+periodic task writes each process's buffer with a bulk insert plus one update
+per ended instance. A row is written when an instance is handed to a player
+and completed with its end time and solve flag when the instance goes away or
+is reset in place. Rows are matched on tracker ID and start time.
+"""
+import atexit
+import os
+import threading
+from datetime import datetime
+
+from CTFd.models import db
+from CTFd.utils.dates import unix_time
+
+from .models import EC2History
+
+
+# Seconds between buffer flushes
+HISTORY_FLUSH_INTERVAL = int(os.environ.get("EC2_HISTORY_FLUSH_INTERVAL", 10))
+
+# Events kept while the database is unavailable, newer events are dropped past this
+MAX_BUFFERED_EVENTS = 50000
+
+_buffer = []
+_buffer_lock = threading.Lock()
+_exit_registered = False
+
+
+def _append(event):
+    with _buffer_lock:
+        if len(_buffer) >= MAX_BUFFERED_EVENTS:
+            print("ERROR: EC2 history buffer is full, dropping event")
+            return
+        _buffer.append(event)
+
+
+def _user_id(owner_id):
+    try:
+        return int(owner_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def record_start(tracker):
+    """
+    Record that a player was given an instance. Unassigned pool instances are skipped.
+    """
+    if tracker.owner_id is None:
+        return
+    _append({
+        "tracker_id": tracker.id,
+        "user_id": _user_id(tracker.owner_id),
+        "challenge_id": tracker.challenge_id,
+        "instance_id": tracker.instance_id,
+        "start_time": tracker.timestamp,
+    })
+
+
+def record_end(tracker, solved=False, start_time=None):
+    """
+    Record that a player's instance was stopped, reset, expired or solved.
+    tracker can be a model instance or a query row with the same columns.
+    start_time is the session's start when the tracker's timestamp has already moved on.
+    """
+    if tracker.owner_id is None:
+        return
+    _append({
+        "tracker_id": tracker.id,
+        "user_id": _user_id(tracker.owner_id),
+        "challenge_id": tracker.challenge_id,
+        "instance_id": tracker.instance_id,
+        "start_time": start_time if start_time is not None else tracker.timestamp,
+        "end_time": unix_time(datetime.utcnow()),
+        "solved": solved,
+    })
+
+
+def flush_history():
+    """
+    Write every buffered event. Runs periodically in the background.
+    """
+    with _buffer_lock:
+        events = _buffer[:]
+        del _buffer[:]
+    if not events:
+        return
+
+    try:
+        # A session is a tracker and its start time, tracker IDs can be reused
+        # and an in-place reset starts a new session on the same tracker
+        starts = {(e["tracker_id"], e["start_time"]): e for e in events if "end_time" not in e}
+        ends = [e for e in events if "end_time" in e]
+
+        # Another process may already have written a row for the same session
+        tracker_ids = {tracker_id for tracker_id, _ in starts} | {e["tracker_id"] for e in ends}
+        existing = {
+            (row.tracker_id, row.start_time)
+            for row in db.session.query(EC2History.tracker_id, EC2History.start_time).filter(
+                EC2History.tracker_id.in_(list(tracker_ids))
+            )
+        }
+
+        inserts = [e for key, e in starts.items() if key not in existing]
+        if inserts:
+            db.session.bulk_insert_mappings(EC2History, inserts)
+            existing.update((e["tracker_id"], e["start_time"]) for e in inserts)
+
+        for event in ends:
+            key = (event["tracker_id"], event["start_time"])
+            if key in existing:
+                values = {"end_time": event["end_time"], "solved": event["solved"]}
+                if event["instance_id"]:
+                    values["instance_id"] = event["instance_id"]
+                EC2History.query.filter(
+                    EC2History.tracker_id == event["tracker_id"],
+                    EC2History.start_time == event["start_time"],
+                    EC2History.end_time.is_(None),
+                ).update(values, synchronize_session=False)
+            else:
+                # Started before history was recorded, or the start is still buffered elsewhere
+                db.session.bulk_insert_mappings(EC2History, [event])
+                existing.add(key)
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        # Put the events back so the next flush retries them
+        with _buffer_lock:
+            _buffer[:0] = events[: max(MAX_BUFFERED_EVENTS - len(_buffer), 0)]
+        raise
+
+
+def flush_at_exit(app):
+    """
+    Flush whatever is still buffered when the process shuts down
+    """
+    global _exit_registered
+    if _exit_registered:
+        return
+    _exit_registered = True
+
+    def flush():
+        with app.app_context():
+            try:
+                flush_history()
+            except Exception as e:
+                print(f"ERROR: Failed to flush EC2 history at exit: {e}")
+
+    atexit.register(flush)
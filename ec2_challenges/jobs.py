@@ -0,0 +1,288 @@
+"""
+Durable queue for the plugin's AWS side effects.
+
+Jobs are rows in ec2_job. enqueue() commits one and wakes this process's
+dispatcher, which claims due jobs with a conditional update, so each job runs
+in exactly one CTFd process, and runs them on the background executor. A job
+that raises is retried with exponential backoff and kept as a dead letter after
+its last attempt. Jobs left running by a process that died are queued again
+once their lease has run out.
+
+Handlers can run more than once (a retry after a partial failure, or a lease
+that ran out), so they must be safe to repeat. A handler raises to have its job
+retried, and can register an on_dead callback that records the failure once the
+job is dead-lettered.
+"""
+import json
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+
+from CTFd.models import db
+
+from . import metrics, tracing
+from .models import EC2Job
+from .workers import MAX_WORKERS, submit, wake
+
+
+# Seconds between checks for due jobs, queued jobs wake the local dispatcher straight away
+JOB_POLL_INTERVAL = float(os.environ.get("EC2_JOB_POLL_INTERVAL", 1))
+
+# Attempts before a job is dead-lettered
+JOB_MAX_ATTEMPTS = int(os.environ.get("EC2_JOB_MAX_ATTEMPTS", 5))
+
+# Seconds before the first retry, doubled for every further attempt up to the maximum
+JOB_RETRY_DELAY = 5
+JOB_MAX_RETRY_DELAY = 300
+
+# Seconds a job may stay running before it is assumed lost with its process
+JOB_LEASE_TIMEOUT = 600
+
+# Seconds between passes that queue lost jobs again
+JOB_RECOVERY_INTERVAL = 60
+
+_handlers = {}
+_dead_handlers = {}
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+
+def _worker_id():
+    # Computed per call, forked CTFd workers share whatever was set at import
+    return f"{socket.gethostname()}:{os.getpid()}"[:64]
+
+
+def job(kind, on_dead=None):
+    """
+    Decorator that registers func as the handler for jobs of this kind.
+    Jobs are stored as JSON, so handlers only take JSON serializable arguments.
+    on_dead is called with the job's arguments and an error keyword argument
+    once the job is dead-lettered.
+    """
+    def decorator(func):
+        _handlers[kind] = func
+        if on_dead is not None:
+            _dead_handlers[kind] = on_dead
+        return func
+
+    return decorator
+
+
+def enqueue(kind, *args, delay=0):
+    """
+    Queue a job and commit it along with anything else pending in the session.
+    Returns the job ID.
+    """
+    now = int(time.time())
+    entry = EC2Job(
+        kind=kind,
+        payload=json.dumps({"args": list(args), "trace_id": tracing.current_trace_id()}),
+        status="queued",
+        attempts=0,
+        max_attempts=JOB_MAX_ATTEMPTS,
+        run_at=now + delay,
+        created=now,
+    )
+    db.session.add(entry)
+    db.session.commit()
+    wake("jobs")
+    return entry.id
+
+
+def dispatch_jobs():
+    """
+    Claim due jobs for this process's free executor threads and start them.
+    Runs periodically in the background and whenever a job is queued or finishes.
+    """
+    global _in_flight
+    with _in_flight_lock:
+        free = MAX_WORKERS - _in_flight
+    if free <= 0:
+        return
+
+    now = int(time.time())
+    candidates = (
+        db.session.query(EC2Job.id)
+        .filter(EC2Job.status == "queued", EC2Job.run_at <= now)
+        .order_by(EC2Job.run_at, EC2Job.id)
+        .limit(free)
+        .all()
+    )
+
+    worker_id = _worker_id()
+    for (job_id,) in candidates:
+        # Only one process can flip a job from queued to running
+        claimed = EC2Job.query.filter_by(id=job_id, status="queued").update(
+            {
+                "status": "running",
+                "locked_by": worker_id,
+                "locked_at": now,
+                "attempts": EC2Job.attempts + 1,
+            },
+            synchronize_session=False,
+        )
+        db.session.commit()
+        if claimed:
+            with _in_flight_lock:
+                _in_flight += 1
+            submit(run_job, job_id, worker_id)
+
+
+def run_job(job_id, worker_id):
+    """
+    Run one claimed job. Runs in the background executor.
+    """
+    global _in_flight
+    try:
+        _run_job(job_id, worker_id)
+    finally:
+        with _in_flight_lock:
+            _in_flight -= 1
+        # A thread is free again, pick up whatever is waiting
+        wake("jobs")
+
+
+def _run_job(job_id, worker_id):
+    entry = EC2Job.query.filter_by(id=job_id, status="running", locked_by=worker_id).first()
+    if entry is None:
+        # Queued again after its lease ran out
+        return
+    kind = entry.kind
+    attempts = entry.attempts
+    max_attempts = entry.max_attempts or JOB_MAX_ATTEMPTS
+    payload = json.loads(entry.payload or "{}")
+
+    started = time.perf_counter()
+    try:
+        handler = _handlers.get(kind)
+        if handler is None:
+            raise LookupError(f"No handler for job kind {kind}")
+        with tracing.joined(payload.get("trace_id")):
+            handler(*payload.get("args", []))
+    except Exception as e:
+        db.session.rollback()
+        print(f"ERROR: Job {job_id} ({kind}) failed on attempt {attempts}: {e}")
+        traceback.print_exc()
+
+        values = {
+            "last_error": f"{type(e).__name__}: {e}"[:255],
+            "locked_by": None,
+            "locked_at": None,
+        }
+        if attempts >= max_attempts:
+            values["status"] = "dead"
+            outcome = "dead"
+        else:
+            delay = min(JOB_RETRY_DELAY * 2 ** (attempts - 1), JOB_MAX_RETRY_DELAY)
+            values["status"] = "queued"
+            values["run_at"] = int(time.time() + delay + random.uniform(0, delay / 2))
+            outcome = "retried"
+        EC2Job.query.filter_by(id=job_id, locked_by=worker_id).update(values, synchronize_session=False)
+        db.session.commit()
+        if outcome == "dead":
+            _dead_letter(kind, payload.get("args", []), values["last_error"])
+    else:
+        EC2Job.query.filter_by(id=job_id).delete(synchronize_session=False)
+        db.session.commit()
+        outcome = "done"
+
+    metrics.JOBS.inc(kind, outcome)
+    metrics.JOB_SECONDS.observe(time.perf_counter() - started, kind)
+
+
+def _dead_letter(kind, args, error):
+    on_dead = _dead_handlers.get(kind)
+    if on_dead is None:
+        return
+    try:
+        on_dead(*args, error=error)
+    except Exception as e:
+        db.session.rollback()
+        print(f"ERROR: Dead letter callback for {kind} failed: {e}")
+
+
+def recover_stale_jobs():
+    """
+    Queue jobs again whose process stopped while running them, or dead-letter
+    them if that was their last attempt. Runs periodically in the background.
+    """
+    now = int(time.time())
+    stale = (EC2Job.status == "running", EC2Job.locked_at < now - JOB_LEASE_TIMEOUT)
+    error = "Worker stopped while running the job"
+
+    lost = (
+        db.session.query(EC2Job.id, EC2Job.kind, EC2Job.payload)
+        .filter(*stale, EC2Job.attempts >= EC2Job.max_attempts)
+        .all()
+    )
+    dead = 0
+    if lost:
+        dead = EC2Job.query.filter(EC2Job.id.in_([entry.id for entry in lost]), *stale).update(
+            {"status": "dead", "last_error": error, "locked_by": None, "locked_at": None},
+            synchronize_session=False,
+        )
+    EC2Job.query.filter(*stale).update(
+        {"status": "queued", "run_at": now, "last_error": error, "locked_by": None, "locked_at": None},
+        synchronize_session=False,
+    )
+    db.session.commit()
+    if dead:
+        for entry in lost:
+            metrics.JOBS.inc(entry.kind, "dead")
+            _dead_letter(entry.kind, json.loads(entry.payload or "{}").get("args", []), error)
+
+
+def retry_dead_jobs(job_id=None):
+    """
+    Queue dead-lettered jobs again with fresh attempts, one job or all of them.
+    Returns how many were queued.
+    """
+    query = EC2Job.query.filter_by(status="dead")
+    if job_id is not None:
+        query = query.filter_by(id=job_id)
+    retried = query.update(
+        {"status": "queued", "attempts": 0, "run_at": int(time.time())},
+        synchronize_session=False,
+    )
+    db.session.commit()
+    if retried:
+        wake("jobs")
+    return retried
+
+
+def queue_stats(dead_limit=50):
+    """
+    Job counts by kind and status, how long the oldest due job has waited and the
+    most recent dead letters
+    """
+    now = int(time.time())
+    depth = [
+        {"kind": kind, "status": status, "count": count}
+        for kind, status, count in db.session.query(
+            EC2Job.kind, EC2Job.status, db.func.count(EC2Job.id)
+        ).group_by(EC2Job.kind, EC2Job.status)
+    ]
+    oldest = (
+        db.session.query(db.func.min(EC2Job.run_at))
+        .filter(EC2Job.status == "queued", EC2Job.run_at <= now)
+        .scalar()
+    )
+    dead = [
+        {
+            "id": entry.id,
+            "kind": entry.kind,
+            "payload": entry.payload,
+            "attempts": entry.attempts,
+            "created": entry.created,
+            "last_error": entry.last_error,
+        }
+        for entry in EC2Job.query.filter_by(status="dead").order_by(EC2Job.id.desc()).limit(dead_limit)
+    ]
+    return {
+        "depth": depth,
+        "oldest_due_seconds": now - oldest if oldest else 0,
+        "dead": dead,
+    }
@@ -0,0 +1,143 @@
+"""
+Minimal in-process metrics rendered in the Prometheus text format.
+
+Recording a value is a dict lookup and an addition under a lock, so it is cheap
+enough for request paths and botocore hooks. Values are per process; with
+several CTFd workers each scrape sees the worker that answered it.
+"""
+import threading
+
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15, 30, 60, 120, 300)
+
+_registry = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def collect(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = list(self._values.items())
+        for labelvalues, value in sorted(values):
+            yield f"{self.name}{_labels(self.labelnames, labelvalues)} {value}"
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labelvalues -> [count per bucket..., +Inf count, sum]
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, *labelvalues):
+        with self._lock:
+            series = self._values.get(labelvalues)
+            if series is None:
+                series = self._values[labelvalues] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[-2] += 1
+            series[-1] += value
+
+    def collect(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            values = [(labelvalues, list(series)) for labelvalues, series in self._values.items()]
+        for labelvalues, series in sorted(values):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                labels = _labels(self.labelnames, labelvalues, [("le", bound)])
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _labels(self.labelnames, labelvalues)
+            yield f"{self.name}_sum{labels} {series[-1]}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+def gauge(name, documentation, samples, labelnames=()):
+    """
+    Render a gauge computed at scrape time from (labelvalues, value) pairs
+    """
+    yield f"# HELP {name} {documentation}"
+    yield f"# TYPE {name} gauge"
+    for labelvalues, value in samples:
+        yield f"{name}{_labels(labelnames, labelvalues)} {value}"
+
+
+def render(*extra):
+    """
+    Render every registered metric, followed by any extra pre-rendered lines
+    """
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.collect())
+    for collected in extra:
+        lines.extend(collected)
+    return "\n".join(lines) + "\n"
+
+
+AWS_CALLS = Counter(
+    "ec2_aws_calls_total", "AWS API calls made, including failed ones", ["action"]
+)
+AWS_ERRORS = Counter(
+    "ec2_aws_errors_total", "AWS API calls that failed after retries", ["action", "code"]
+)
+AWS_CALL_SECONDS = Histogram(
+    "ec2_aws_call_seconds", "AWS API call duration including retries and rate limiting", ["action"]
+)
+LAUNCHES = Counter(
+    "ec2_launches_total", "Instances handed to players by where they came from", ["source"]
+)
+LAUNCH_REQUEST_SECONDS = Histogram(
+    "ec2_launch_request_seconds", "Time from a player's launch request until RunInstances returned"
+)
+LAUNCH_BOOT_SECONDS = Histogram(
+    "ec2_launch_boot_seconds", "Time from RunInstances until the poller saw the instance running"
+)
+LAUNCH_IP_SECONDS = Histogram(
+    "ec2_launch_ip_seconds", "Time from the poller seeing an instance running until it had a public IP"
+)
+REAPED = Counter(
+    "ec2_instances_reaped_total", "Expired player instances terminated by the reaper"
+)
+STATUS_REQUESTS = Counter(
+    "ec2_instance_status_requests_total", "Instance status polls and stream connections", ["endpoint"]
+)
+JOBS = Counter(
+    "ec2_jobs_total", "Background jobs run by kind and outcome (done, retried or dead)", ["kind", "outcome"]
+)
+JOB_SECONDS = Histogram(
+    "ec2_job_seconds", "Background job run time", ["kind"]
+)
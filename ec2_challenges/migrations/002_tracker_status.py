@@ -0,0 +1,31 @@
+"""Add provisioning status to EC2 challenge trackers
+
+Revision ID: 002_tracker_status
+Revises: 001_ec2_challenges
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "002_tracker_status"
+down_revision = "001_ec2_challenges"
+branch_labels = None
+depends_on = None
+
+
+def upgrade(op=None):
+    op.add_column(
+        'ec2_challenge_tracker',
+        sa.Column('status', sa.String(length=32), nullable=True)
+    )
+    op.add_column(
+        'ec2_challenge_tracker',
+        sa.Column('error', sa.String(length=255), nullable=True)
+    )
+
+
+def downgrade(op=None):
+    op.drop_column('ec2_challenge_tracker', 'error')
+    op.drop_column('ec2_challenge_tracker', 'status')
@@ -0,0 +1,26 @@
+"""Add warm pool size to EC2 challenges
+
+Revision ID: 003_warm_pool
+Revises: 002_tracker_status
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "003_warm_pool"
+down_revision = "002_tracker_status"
+branch_labels = None
+depends_on = None
+
+
+def upgrade(op=None):
+    op.add_column(
+        'ec2_challenge',
+        sa.Column('warm_pool_size', sa.Integer(), nullable=True, server_default='0')
+    )
+
+
+def downgrade(op=None):
+    op.drop_column('ec2_challenge', 'warm_pool_size')
@@ -0,0 +1,32 @@
+"""Add bulk provisioning batch to EC2 challenge trackers
+
+Revision ID: 004_tracker_batch
+Revises: 003_warm_pool
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "004_tracker_batch"
+down_revision = "003_warm_pool"
+branch_labels = None
+depends_on = None
+
+
+def upgrade(op=None):
+    op.add_column(
+        'ec2_challenge_tracker',
+        sa.Column('batch_id', sa.String(length=64), nullable=True)
+    )
+    op.create_index(
+        'ix_ec2_challenge_tracker_batch_id',
+        'ec2_challenge_tracker',
+        ['batch_id']
+    )
+
+
+def downgrade(op=None):
+    op.drop_index('ix_ec2_challenge_tracker_batch_id', table_name='ec2_challenge_tracker')
+    op.drop_column('ec2_challenge_tracker', 'batch_id')
@@ -0,0 +1,34 @@
+"""Link EC2 history to trackers and index it for analytics
+
+Revision ID: 005_history_indexes
+Revises: 004_tracker_batch
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "005_history_indexes"
+down_revision = "004_tracker_batch"
+branch_labels = None
+depends_on = None
+
+
+def upgrade(op=None):
+    op.add_column(
+        'ec2_history',
+        sa.Column('tracker_id', sa.Integer(), nullable=True)
+    )
+    op.create_index('ix_ec2_history_tracker_id', 'ec2_history', ['tracker_id'])
+    op.create_index('ix_ec2_history_user_id', 'ec2_history', ['user_id'])
+    op.create_index('ix_ec2_history_challenge_id', 'ec2_history', ['challenge_id'])
+    op.create_index('ix_ec2_history_start_time', 'ec2_history', ['start_time'])
+
+
+def downgrade(op=None):
+    op.drop_index('ix_ec2_history_start_time', table_name='ec2_history')
+    op.drop_index('ix_ec2_history_challenge_id', table_name='ec2_history')
+    op.drop_index('ix_ec2_history_user_id', table_name='ec2_history')
+    op.drop_index('ix_ec2_history_tracker_id', table_name='ec2_history')
+    op.drop_column('ec2_history', 'tracker_id')
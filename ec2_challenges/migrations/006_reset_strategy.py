@@ -0,0 +1,26 @@
+"""Add reset strategy to EC2 challenges
+
+Revision ID: 006_reset_strategy
+Revises: 005_history_indexes
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "006_reset_strategy"
+down_revision = "005_history_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade(op=None):
+    op.add_column(
+        'ec2_challenge',
+        sa.Column('reset_strategy', sa.String(length=16), nullable=True, server_default='relaunch')
+    )
+
+
+def downgrade(op=None):
+    op.drop_column('ec2_challenge', 'reset_strategy')
@@ -0,0 +1,26 @@
+"""Track in-place reset tasks on EC2 challenge trackers
+
+Revision ID: 007_reset_task
+Revises: 006_reset_strategy
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "007_reset_task"
+down_revision = "006_reset_strategy"
+branch_labels = None
+depends_on = None
+
+
+def upgrade(op=None):
+    op.add_column(
+        'ec2_challenge_tracker',
+        sa.Column('reset_task_id', sa.String(length=128), nullable=True)
+    )
+
+
+def downgrade(op=None):
+    op.drop_column('ec2_challenge_tracker', 'reset_task_id')
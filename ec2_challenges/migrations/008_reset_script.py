@@ -0,0 +1,26 @@
+"""Add reset script to EC2 challenges
+
+Revision ID: 008_reset_script
+Revises: 007_reset_task
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "008_reset_script"
+down_revision = "007_reset_task"
+branch_labels = None
+depends_on = None
+
+
+def upgrade(op=None):
+    op.add_column(
+        'ec2_challenge',
+        sa.Column('reset_script', sa.Text(), nullable=True)
+    )
+
+
+def downgrade(op=None):
+    op.drop_column('ec2_challenge', 'reset_script')
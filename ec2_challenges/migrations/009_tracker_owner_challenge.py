@@ -0,0 +1,27 @@
+"""Index EC2 challenge trackers by owner and challenge
+
+Revision ID: 009_tracker_owner_challenge
+Revises: 008_reset_script
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "009_tracker_owner_challenge"
+down_revision = "008_reset_script"
+branch_labels = None
+depends_on = None
+
+
+def upgrade(op=None):
+    op.create_index(
+        'ix_ec2_challenge_tracker_owner_challenge',
+        'ec2_challenge_tracker',
+        ['owner_id', 'challenge_id']
+    )
+
+
+def downgrade(op=None):
+    op.drop_index('ix_ec2_challenge_tracker_owner_challenge', table_name='ec2_challenge_tracker')
@@ -0,0 +1,41 @@
+"""Add the EC2 background job queue
+
+Revision ID: 010_job_queue
+Revises: 009_tracker_owner_challenge
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "010_job_queue"
+down_revision = "009_tracker_owner_challenge"
+branch_labels = None
+depends_on = None
+
+
+def upgrade(op=None):
+    op.create_table(
+        'ec2_job',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=64), nullable=True),
+        sa.Column('payload', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=16), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=True),
+        sa.Column('max_attempts', sa.Integer(), nullable=True),
+        sa.Column('run_at', sa.Integer(), nullable=True),
+        sa.Column('created', sa.Integer(), nullable=True),
+        sa.Column('locked_by', sa.String(length=64), nullable=True),
+        sa.Column('locked_at', sa.Integer(), nullable=True),
+        sa.Column('last_error', sa.String(length=255), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_ec2_job_kind', 'ec2_job', ['kind'])
+    op.create_index('ix_ec2_job_status_run_at', 'ec2_job', ['status', 'run_at'])
+
+
+def downgrade(op=None):
+    op.drop_index('ix_ec2_job_status_run_at', table_name='ec2_job')
+    op.drop_index('ix_ec2_job_kind', table_name='ec2_job')
+    op.drop_table('ec2_job')
@@ -30,6 +30,10 @@ class EC2ChallengeTracker(db.Model):
     EC2 Instance Tracker. This model stores the users/teams active EC2 instances.
     """
     __tablename__ = "ec2_challenge_tracker"
+    # Flag checks and launches look trackers up by player and challenge
+    __table_args__ = (
+        db.Index("ix_ec2_challenge_tracker_owner_challenge", "owner_id", "challenge_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     owner_id = db.Column("owner_id", db.String(64), index=True)
@@ -39,6 +43,15 @@ class EC2ChallengeTracker(db.Model):
     revert_time = db.Column("revert_time", db.Integer, index=True)
     host = db.Column("host", db.String(128), index=True)
     flag = db.Column("flag", db.String(128), index=True)
+    # provisioning -> pending -> (poller/AWS state) or failed, terminating once solved.
+    # Warm pool rows have no owner and move from pending to ready once booted.
+    # An in-place reset moves a row to resetting and back to pending.
+    status = db.Column("status", db.String(32), default="provisioning")
+    error = db.Column("error", db.String(255))
+    # Set on unassigned instances pre-provisioned together by an admin
+    batch_id = db.Column("batch_id", db.String(64), index=True)
+    # AWS task tracking an in-place reset, a root volume replacement or SSM command
+    reset_task_id = db.Column("reset_task_id", db.String(128))
 
 
 class EC2Challenge(Challenges):
@@ -55,6 +68,7 @@ class EC2Challenge(Challenges):
     
     # Challenge Configuration
     setup_script = db.Column(db.Text, default="")
+    reset_script = db.Column(db.Text, default="")  # run over SSM on reset, setup_script if empty
     guide = db.Column(db.Text, default="")
     
     # Connection Configuration
@@ -63,14 +77,45 @@ class EC2Challenge(Challenges):
     
     # Instance Management
     auto_stop_time = db.Column(db.Integer, default=1800)  # 30 minutes
+    warm_pool_size = db.Column(db.Integer, default=0)  # pre-launched unassigned instances
+    reset_strategy = db.Column(db.String(16), default="relaunch")  # relaunch, stop, hibernate, replace_root or ssm
 
 
 class EC2History(db.Model):
+    """
+    One row per instance handed to a player, completed when the instance goes away.
+    """
     __tablename__ = "ec2_history"
     id = db.Column(db.Integer, primary_key=True, index=True)
-    user_id = db.Column(db.Integer)
+    user_id = db.Column(db.Integer, index=True)
     instance_id = db.Column(db.String(128))
-    challenge_id = db.Column(db.Integer)
-    start_time = db.Column(db.Integer)
+    challenge_id = db.Column(db.Integer, index=True)
+    start_time = db.Column(db.Integer, index=True)
     end_time = db.Column(db.Integer)
     solved = db.Column(db.Boolean(), default=False)
+    tracker_id = db.Column(db.Integer, index=True)
+
+
+class EC2Job(db.Model):
+    """
+    Durable background job for an AWS side effect. Workers claim queued rows with
+    a conditional update, delete them when they succeed and keep them as dead
+    letters once they run out of attempts.
+    """
+    __tablename__ = "ec2_job"
+    # Workers look for queued jobs that are due
+    __table_args__ = (
+        db.Index("ix_ec2_job_status_run_at", "status", "run_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(64), index=True)
+    payload = db.Column(db.Text)  # JSON: {"args": [...], "trace_id": ...}
+    status = db.Column(db.String(16), default="queued")  # queued, running or dead
+    attempts = db.Column(db.Integer, default=0)
+    max_attempts = db.Column(db.Integer, default=5)
+    run_at = db.Column(db.Integer)  # Unix timestamp the job is due at
+    created = db.Column(db.Integer)
+    locked_by = db.Column(db.String(64))
+    locked_at = db.Column(db.Integer)
+    last_error = db.Column(db.String(255))
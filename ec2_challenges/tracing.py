@@ -0,0 +1,238 @@
+"""
+Opt-in timing spans for launches, AWS helpers and database queries.
+
+Set EC2_TRACING to a file path to append spans as JSON lines, or to an http(s)
+URL to POST them to a collector in batches. When it is unset the decorators
+return the original functions and span() is a no-op, so nothing is paid for.
+
+Spans in one trace share a trace_id. A launch's trace is bound to its tracker
+so status polls and the background launch report under the same ID, and
+background jobs inherit the trace of the request that queued them.
+"""
+import contextvars
+import json
+import os
+import queue
+import threading
+import time
+import urllib.request
+import uuid
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+from flask import request
+
+from CTFd.cache import cache
+
+
+TARGET = os.environ.get("EC2_TRACING", "")
+ENABLED = bool(TARGET)
+
+# Seconds between exports, and the most spans held while the exporter catches up
+FLUSH_INTERVAL = 1
+MAX_QUEUED_SPANS = 10000
+
+# Seconds a launch's trace ID stays bound to its tracker
+TRACE_BINDING_TIMEOUT = 3600
+
+_trace_id = contextvars.ContextVar("ec2_trace_id", default=None)
+_span_id = contextvars.ContextVar("ec2_span_id", default=None)
+
+_spans = queue.Queue(maxsize=MAX_QUEUED_SPANS)
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def _export(batch):
+    if TARGET.startswith("http://") or TARGET.startswith("https://"):
+        req = urllib.request.Request(
+            TARGET,
+            data=json.dumps({"spans": batch}).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        urllib.request.urlopen(req, timeout=5).close()
+    else:
+        with open(TARGET, "a") as f:
+            for record in batch:
+                f.write(json.dumps(record) + "\n")
+
+
+def _export_loop():
+    while True:
+        batch = [_spans.get()]
+        time.sleep(FLUSH_INTERVAL)
+        while True:
+            try:
+                batch.append(_spans.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            _export(batch)
+        except Exception as e:
+            print(f"ERROR: Failed to export {len(batch)} trace spans: {e}")
+
+
+def _record(record):
+    global _exporter
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                _exporter = threading.Thread(target=_export_loop, name="ec2-tracing", daemon=True)
+                _exporter.start()
+    try:
+        _spans.put_nowait(record)
+    except queue.Full:
+        # Never hold up a request because the exporter is behind
+        pass
+
+
+@contextmanager
+def _span(name, attributes):
+    trace_id = _trace_id.get()
+    trace_token = None
+    if trace_id is None:
+        trace_id = uuid.uuid4().hex
+        trace_token = _trace_id.set(trace_id)
+    parent_id = _span_id.get()
+    span_id = uuid.uuid4().hex[:16]
+    span_token = _span_id.set(span_id)
+
+    record = {
+        "trace_id": trace_id,
+        "span_id": span_id,
+        "parent_id": parent_id,
+        "name": name,
+        "start": time.time(),
+        "thread": threading.current_thread().name,
+        "attributes": attributes,
+    }
+    started = time.perf_counter()
+    try:
+        yield record
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        _span_id.reset(span_token)
+        if trace_token is not None:
+            _trace_id.reset(trace_token)
+        _record(record)
+
+
+def span(name, **attributes):
+    """
+    Time a block as a span of the current trace, starting a trace if there is none
+    """
+    if not ENABLED:
+        return nullcontext()
+    return _span(name, attributes)
+
+
+def traced(func):
+    """
+    Decorator that times every call of func as a span
+    """
+    if not ENABLED:
+        return func
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with _span(func.__qualname__, {}):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def traced_tracker_request(arg="id"):
+    """
+    Decorator for API methods about one tracker. The request joins the trace of
+    the launch bound to the tracker ID in request.args[arg], or starts a new one.
+    """
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            tracker_id = request.args.get(arg)
+            trace_id = cache.get(f"ec2_trace_{tracker_id}") if tracker_id else None
+            token = _trace_id.set(trace_id or uuid.uuid4().hex)
+            try:
+                with _span(func.__qualname__, {"tracker_id": tracker_id}):
+                    return func(*args, **kwargs)
+            finally:
+                _trace_id.reset(token)
+
+        return wrapper
+
+    return decorator
+
+
+def current_trace_id():
+    """
+    The ID of the current trace, or None outside of one
+    """
+    return _trace_id.get() if ENABLED else None
+
+
+@contextmanager
+def joined(trace_id):
+    """
+    Continue a trace started elsewhere, e.g. by the request that queued a job
+    """
+    if not ENABLED or not trace_id:
+        yield
+        return
+    token = _trace_id.set(trace_id)
+    try:
+        yield
+    finally:
+        _trace_id.reset(token)
+
+
+def bind_tracker(tracker_id):
+    """
+    Bind the current trace to a tracker so later requests about it join the trace
+    """
+    trace_id = _trace_id.get()
+    if ENABLED and trace_id:
+        cache.set(f"ec2_trace_{tracker_id}", trace_id, timeout=TRACE_BINDING_TIMEOUT)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _trace_id.get() is None:
+        return
+    span_ctx = _span("db.query", {"statement": statement[:200]})
+    span_ctx.__enter__()
+    conn.info.setdefault("ec2_spans", []).append(span_ctx)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get("ec2_spans")
+    if spans:
+        spans.pop().__exit__(None, None, None)
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    spans = conn.info.get("ec2_spans") if conn is not None else None
+    if spans:
+        e = exception_context.original_exception
+        spans.pop().__exit__(type(e), e, None)
+
+
+def install():
+    """
+    Time SQL statements that run inside a trace. Called once when the plugin loads.
+    """
+    if not ENABLED:
+        return
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
@@ -0,0 +1,152 @@
+import contextvars
+import os
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+from CTFd.cache import cache
+from CTFd.models import db
+
+
+# Number of threads available for background AWS work in each CTFd process
+MAX_WORKERS = int(os.environ.get("EC2_EXECUTOR_WORKERS", 8))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def async_workers():
+    """
+    Whether this process serves requests on gevent or eventlet green threads,
+    where a long-lived response doesn't hold a whole worker
+    """
+    # Only look at what the server already imported, never import either here
+    if "gevent.monkey" in sys.modules and sys.modules["gevent.monkey"].is_module_patched("socket"):
+        return True
+    if "eventlet.patcher" in sys.modules and sys.modules["eventlet.patcher"].is_monkey_patched("socket"):
+        return True
+    return False
+
+
+def get_executor():
+    """
+    Get the process wide executor used for background AWS work
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=MAX_WORKERS, thread_name_prefix="ec2-worker"
+                )
+    return _executor
+
+
+def submit(func, *args, **kwargs):
+    """
+    Run func in the background executor inside the current application context.
+    Context variables such as the current trace are carried over to the job.
+    """
+    app = current_app._get_current_object()
+    context = contextvars.copy_context()
+
+    def run():
+        with app.app_context():
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                print(f"ERROR: Background task {func.__name__} failed: {e}")
+                traceback.print_exc()
+                db.session.rollback()
+            finally:
+                db.session.remove()
+
+    return get_executor().submit(context.run, run)
+
+
+class PeriodicWorker(threading.Thread):
+    """
+    Daemon thread that runs func inside an application context every interval
+    seconds, or sooner when woken up.
+
+    With exclusive=True a lock in CTFd's cache keeps CTFd processes from running
+    the task at the same time, and a process skips its turn when another one
+    already ran the task during the current interval.
+    """
+
+    def __init__(self, app, name, interval, func, exclusive=False):
+        super().__init__(name=f"ec2-{name}", daemon=True)
+        self.app = app
+        self.task_name = name
+        self.interval = interval
+        self.func = func
+        self.exclusive = exclusive
+        self._wake = threading.Event()
+
+    def wake(self):
+        self._wake.set()
+
+    def run(self):
+        while True:
+            woken = self._wake.wait(self.interval)
+            self._wake.clear()
+            with self.app.app_context():
+                try:
+                    if self.exclusive:
+                        self._run_exclusive(woken)
+                    else:
+                        self.func()
+                except Exception as e:
+                    print(f"ERROR: Periodic task {self.task_name} failed: {e}")
+                    traceback.print_exc()
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+
+    def _run_exclusive(self, woken):
+        lock_key = f"ec2_worker_lock_{self.task_name}"
+        last_run_key = f"ec2_worker_last_run_{self.task_name}"
+
+        # The timeout only matters if a process dies while holding the lock
+        if not cache.add(lock_key, 1, timeout=max(int(self.interval) * 4, 60)):
+            return
+        try:
+            last_run = cache.get(last_run_key)
+            if not woken and last_run and time.time() - last_run < self.interval * 0.9:
+                return
+            self.func()
+            cache.set(last_run_key, time.time(), timeout=max(int(self.interval) * 4, 60))
+        finally:
+            cache.delete(lock_key)
+
+
+_periodic = {}
+
+
+def start_periodic(app, name, interval, func, exclusive=False):
+    """
+    Start a periodic background task once per process
+    """
+    worker = _periodic.get(name)
+    if worker is not None:
+        # The app was recreated (e.g. in tests), run against the new one
+        worker.app = app
+        return worker
+
+    worker = PeriodicWorker(app, name, interval, func, exclusive=exclusive)
+    _periodic[name] = worker
+    worker.start()
+    return worker
+
+
+def wake(name):
+    """
+    Run a periodic task now instead of waiting for its next interval
+    """
+    worker = _periodic.get(name)
+    if worker is not None:
+        worker.wake()